@@ -1,3 +1,10 @@
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .utils import instrumentation
+from .utils.db_routing import enter_request, exit_request, pin_user, routing_state
+
+
 class SecurityHeadersMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -11,3 +18,61 @@ class SecurityHeadersMiddleware:
         response.headers['Content-Security-Policy'] = "default-src 'self'"
         response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
         return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Track database writes per request and pin the writer to the primary.
+    Unloaded when DATABASE_REPLICAS is empty, so single-node writes skip the pin.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed("No read replicas configured")
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = enter_request()
+        try:
+            response = self.get_response(request)
+            wrote = routing_state().wrote
+        finally:
+            exit_request(token)
+        if wrote:
+            # DRF assigns the authenticated user back onto the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_user(user.pk)
+        return response
+
+
+class InstrumentationMiddleware:
+    """
+    Per-request wall time, DB query count/time, cache hits/misses and serializer time:
+    - Aggregated per route into the INSTRUMENTATION metrics store, served at /metrics
+    - Sent back to staff users as a Server-Timing header
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        token = instrumentation.enter_request()
+        timings = instrumentation.current_timings()
+        try:
+            with instrumentation.track_queries():
+                response = self.get_response(request)
+        finally:
+            instrumentation.exit_request(token)
+        duration = time.perf_counter() - timings.started
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match is not None else 'unmatched'  # Keeps 404 probes to one series
+        instrumentation.get_metrics().observe(route, request.method, response.status_code, duration, timings)
+
+        # DRF assigns the authenticated user back onto the Django request
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = timings.server_timing(duration)
+        return response
@@ -56,8 +56,78 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Write-behind persistence for chat messages (chat/buffer.py)
+CHAT_WRITE_BUFFER = {
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 0.005,  # Seconds before a partial batch is written
+    'MAX_PENDING': 1000,  # Consumers wait once this many rows are unwritten
+    'MAX_RETRIES': 5,  # Attempts per failed batch before it is logged as lost
+    'RETRY_BACKOFF': 0.05,  # Seconds before the first retry, doubled after each failure
+}
+
+# Retention for chat_chatmessage; older rows move to compressed archive chunks
+CHAT_ARCHIVE = {
+    'MAX_AGE_DAYS': 90,
+    'BATCH_SIZE': 1000,  # Rows moved per transaction by archive_chat_messages
+}
+
+# Chat presence registry (chat/presence.py); LocalPresence for tests
+CHAT_PRESENCE = {
+    'BACKEND': 'chat.presence.RedisPresence',
+    'LOCATION': 'redis://127.0.0.1:6379/3',
+    'TTL': 60,  # Seconds without a heartbeat before a socket counts as gone
+}
+
+# Outbound frame coalescing for clients offering the 'dormfinder.batch' subprotocol
+CHAT_FRAME_BATCH = {
+    'WINDOW': 0.01,  # Seconds to gather events into one array frame
+    'MAX_EVENTS': 50,  # Flush early once this many events are queued
+}
+
+# Seconds booking status changes are held so rapid transitions reach clients as one event
+BOOKING_NOTIFICATION_WINDOW = 0.25
+
+# Seconds a WebSocket principal is reused across reconnects (keyed by token jti)
+WEBSOCKET_PRINCIPAL_CACHE_TIMEOUT = 30
+
+# Payment provider callbacks (core/webhooks.py); a provider without a secret is rejected
+PAYMENT_WEBHOOKS = {
+    'SECRETS': {
+        'gcash': os.getenv("GCASH_WEBHOOK_SECRET", ""),
+        'bank_transfer': os.getenv("BANK_WEBHOOK_SECRET", ""),
+    },
+    'WORKERS': 4,  # Threads processing accepted events off the request thread
+    'MAX_ATTEMPTS': 5,  # Failed processing is retried by process_payment_webhooks until this
+}
+
+# Rate limit state for campusdorm_project.utils.throttling; LocalRateStore for tests
+THROTTLE_STORE = {
+    'BACKEND': 'campusdorm_project.utils.throttling.RedisRateStore',
+    'LOCATION': 'redis://127.0.0.1:6379/4',
+    'OPTIONS': {
+        # Checked on every request, so fail open quickly rather than wait on Redis
+        'socket_connect_timeout': 0.5,
+        'socket_timeout': 0.5
+    }
+}
+
+# Per-request metrics (campusdorm_project/utils/instrumentation.py); LocalMetrics for tests
+INSTRUMENTATION = {
+    'BACKEND': 'campusdorm_project.utils.instrumentation.RedisMetrics',
+    'LOCATION': 'redis://127.0.0.1:6379/5',
+    'OPTIONS': {
+        # Written on every request, so drop metrics quickly rather than wait on Redis
+        'socket_connect_timeout': 0.5,
+        'socket_timeout': 0.5
+    },
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),  # Request duration, seconds
+    'TOKEN': os.getenv("METRICS_TOKEN", ""),  # Bearer token Prometheus scrapes /metrics with; empty disables it
+}
+
 MIDDLEWARE = [
+    "campusdorm_project.middleware.InstrumentationMiddleware",  # Outermost, so timings cover everything
     "django.middleware.security.SecurityMiddleware",
+    "campusdorm_project.middleware.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -69,8 +139,8 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'campusdorm_project.utils.throttling.AnonRateThrottle',
+        'campusdorm_project.utils.throttling.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -156,13 +226,72 @@ SIMPLE_JWT = {
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite profile for single-node deployments, applied as each connection opens.
+# With transaction_mode IMMEDIATE every atomic() block takes the database write
+# lock on entry, even one that only reads, so keep read-only paths out of atomic().
+SQLITE_OPTIONS = {
+    "transaction_mode": "IMMEDIATE",  # atomic() takes the write lock up front instead of failing to upgrade
+    "timeout": 20,  # busy_timeout (seconds) writers wait for the lock
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"  # Readers and the writer don't block each other
+        "PRAGMA synchronous=NORMAL;"  # fsync at checkpoints only; safe with WAL
+        "PRAGMA mmap_size=268435456;"  # 256 MiB memory-mapped reads
+        "PRAGMA cache_size=-20000;"  # ~20 MB page cache per connection
+        "PRAGMA temp_store=MEMORY;"
+    ),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": SQLITE_OPTIONS,
+        "CONN_MAX_AGE": 600,  # Keep each thread's connection (and its PRAGMAs) between requests
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Production Postgres, enabled by POSTGRES_DB. With DB_POOL_MAX_SIZE > 0 every thread
+# in the process (WSGI workers and the Channels database executor) borrows from one
+# bounded psycopg pool; DB_POOL_MAX_SIZE=0 keeps a persistent connection per thread.
+if os.getenv("POSTGRES_DB"):
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv("POSTGRES_DB"),
+        "USER": os.getenv("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+        "HOST": os.getenv("POSTGRES_HOST", "127.0.0.1"),
+        "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": 0 if DB_POOL_MAX_SIZE else 600,  # Django's pool manages lifetimes itself
+        "CONN_HEALTH_CHECKS": True,  # Pooled: checked on checkout; persistent: before reuse
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                "max_size": DB_POOL_MAX_SIZE,
+                "timeout": 10,  # Seconds to wait for a free connection before failing
+                "max_idle": 300,
+                "max_lifetime": 1800,
+            },
+        } if DB_POOL_MAX_SIZE else {},
+    }
+
+# Read replicas used by ReplicaRouter; DB_REPLICA_PATHS lists SQLite copies for local testing
+DATABASE_REPLICAS = []
+for index, path in enumerate(filter(None, os.getenv("DB_REPLICA_PATHS", "").split(","))):
+    DATABASES[f"replica_{index + 1}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "OPTIONS": SQLITE_OPTIONS,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index + 1}")
+
+DATABASE_ROUTERS = ["campusdorm_project.utils.db_routing.ReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they write
+DATABASE_READ_YOUR_WRITES_WINDOW = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,95 @@
+import hashlib
+from django.db.models import Count, Max
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified validators for viewset reads:
+    - list: ETag only, from the filtered set's count and max(updated_at) in one query
+      (a row leaving the set doesn't move the max, so Last-Modified would go stale)
+    - retrieve: the object's updated_at, from a fetch of just the validator and
+      ``conditional_permission_fields`` (what the object permissions read)
+    - Expanded relations contribute their own updated_at
+    A matching If-None-Match / If-Modified-Since gets a 304 before the object is
+    loaded in full or serialized.
+    """
+    last_modified_field = 'updated_at'
+    conditional_permission_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        field = self.last_modified_field
+        aggregates = {'count': Count('pk'), 'last_modified': Max(field)}
+        for name in self._expanded():
+            aggregates[f'{name}_modified'] = Max(f'{name}__{field}')
+        fingerprint = self.filter_queryset(self.get_queryset()).aggregate(**aggregates)
+        modified = [value for key, value in fingerprint.items() if key != 'count']
+        validators = self._validators(request, [fingerprint['count'], *modified], None)
+        not_modified = self._not_modified(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        return self._with_validators(super().list(request, *args, **kwargs), *validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        stub = self._get_validator_object()
+        field = self.last_modified_field
+        modified = [getattr(stub, field)]
+        modified += [getattr(getattr(stub, name), field, None) for name in self._expanded()]
+        validators = self._validators(request, [stub.pk, *modified], self._latest(modified))
+        not_modified = self._not_modified(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        instance = self.get_object()
+        return self._with_validators(Response(self.get_serializer(instance).data), *validators)
+
+    def _get_validator_object(self):
+        """get_object() loading only validator and permission fields, without joins or prefetches"""
+        field = self.last_modified_field
+        expanded = self._expanded()
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        stub = get_object_or_404(
+            queryset.select_related(*expanded).only(
+                'pk', field, *self.conditional_permission_fields,
+                *expanded, *(f'{name}__{field}' for name in expanded)
+            ),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, stub)
+        return stub
+
+    def _expanded(self):
+        """Inlined relations (see SparseFieldsMixin), whose edits also change the representation"""
+        return getattr(self, 'requested_expand', ())
+
+    @staticmethod
+    def _latest(timestamps):
+        return max((timestamp for timestamp in timestamps if timestamp), default=None)
+
+    def _validators(self, request, fingerprint, last_modified):
+        """(etag, last_modified) for this representation of the fingerprinted data"""
+        raw = '|'.join(str(part) for part in (
+            request.get_full_path(),
+            request.accepted_media_type,
+            getattr(request.user, 'pk', None),
+            *fingerprint,
+        ))
+        etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+        return etag, int(last_modified.timestamp()) if last_modified else None
+
+    @staticmethod
+    def _not_modified(request, etag, last_modified):
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            ConditionalGetMixin._with_validators(response, etag, last_modified)
+        return response
+
+    @staticmethod
+    def _with_validators(response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
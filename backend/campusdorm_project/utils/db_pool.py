@@ -0,0 +1,28 @@
+from django.db import connections
+
+
+def pool_stats():
+    """
+    Gauges for every pooled database alias in this process:
+    - connections_in_use / connections_open / connections_max
+    - requests_waiting right now, plus cumulative checkout wait time
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)  # Only the Postgres backend pools
+        if pool is None or pool.closed:
+            continue  # Opened lazily by the first query
+        raw = pool.get_stats()  # Counters that never fired are omitted
+        requests = raw.get('requests_num', 0)
+        wait_ms = raw.get('requests_wait_ms', 0)
+        stats[alias] = {
+            'connections_in_use': raw.get('pool_size', 0) - raw.get('pool_available', 0),
+            'connections_open': raw.get('pool_size', 0),
+            'connections_max': raw.get('pool_max', 0),
+            'requests_waiting': raw.get('requests_waiting', 0),
+            'requests_total': requests,
+            'requests_timed_out': raw.get('requests_errors', 0),
+            'wait_ms_total': wait_ms,
+            'wait_ms_average': round(wait_ms / requests, 2) if requests else 0,
+        }
+    return stats
@@ -0,0 +1,89 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_request_state = ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    """Per-request routing flags, installed by ReplicaPinningMiddleware"""
+
+    def __init__(self):
+        self.replica = None  # Alias chosen for this request's replica-safe reads
+        self.wrote = False
+
+
+def routing_state():
+    return _request_state.get()
+
+
+def enter_request():
+    """Start tracking a request; returns the token for exit_request()"""
+    return _request_state.set(RoutingState())
+
+
+def exit_request(token):
+    _request_state.reset(token)
+
+
+def _pin_key(user_id):
+    return f"db_pin:{user_id}"
+
+
+def pin_user(user_id):
+    """Keep the user's reads on the primary until their writes have replicated"""
+    cache.set(_pin_key(user_id), 1, timeout=settings.DATABASE_READ_YOUR_WRITES_WINDOW)
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(_pin_key(user.pk)) is not None
+
+
+class ReplicaRouter:
+    """
+    Primary/replica routing:
+    - Writes, and reads outside replica-safe views, go to the primary
+    - Views using ReplicaReadMixin read from one of DATABASE_REPLICAS
+    - A write sends the rest of the request, and the user's reads for
+      DATABASE_READ_YOUR_WRITES_WINDOW seconds, back to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state()
+        if state is not None and state.replica and not state.wrote:
+            return state.replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = routing_state()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Replicas hold copies of the same rows
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Serve a view's safe actions from a replica unless the user wrote recently.
+    ``replica_actions`` lists the viewset actions that tolerate replication lag.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)  # Authenticates request.user
+        state = routing_state()
+        if (
+            state is not None
+            and settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and getattr(self, 'action', None) in self.replica_actions
+            and not is_pinned(request.user)
+        ):
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
@@ -0,0 +1,338 @@
+import abc
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.utils.module_loading import import_string
+from . import redis_client
+from .db_pool import pool_stats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# name -> (type, help); series are stored as their exposition-format sample names
+METRICS = {
+    'http_requests_total': ('counter', "Requests served, by route, method and status"),
+    'http_request_duration_seconds': ('histogram', "Wall time spent in Django per request"),
+    'http_request_db_queries_total': ('counter', "Database queries issued while serving requests"),
+    'http_request_db_seconds_total': ('counter', "Time spent waiting on database queries"),
+    'http_request_cache_hits_total': ('counter', "Cache lookups that found a value"),
+    'http_request_cache_misses_total': ('counter', "Cache lookups that found nothing"),
+    'http_request_serializer_seconds_total': ('counter', "Time spent rendering serializer representations"),
+}
+
+# pool_stats() key -> (type, help), exposed as db_pool_<key>{alias=...}
+POOL_METRICS = {
+    'connections_in_use': ('gauge', "Pooled connections checked out"),
+    'connections_open': ('gauge', "Connections the pool holds open"),
+    'connections_max': ('gauge', "Most connections the pool may open"),
+    'requests_waiting': ('gauge', "Checkouts waiting for a connection"),
+    'requests_total': ('counter', "Connection checkouts"),
+    'requests_timed_out': ('counter', "Checkouts that gave up waiting"),
+    'wait_ms_total': ('counter', "Milliseconds spent waiting for connections"),
+    'wait_ms_average': ('gauge', "Average checkout wait in milliseconds"),
+}
+
+
+@dataclass
+class RequestTimings:
+    started: float
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    serializer_seconds: float = 0.0
+    serializer_depth: int = 0  # Nested representations are part of the outermost one's time
+
+    def server_timing(self, total):
+        """Server-Timing header value, durations in ms"""
+        return ', '.join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'serialize;dur={self.serializer_seconds * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+_current = ContextVar('request_timings', default=None)
+
+
+def enter_request():
+    """Start tallying a request; returns the token for exit_request()"""
+    return _current.set(RequestTimings(started=time.perf_counter()))
+
+
+def exit_request(token):
+    _current.reset(token)
+
+
+def current_timings():
+    """Tallies of the request being served, or None outside one"""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper hook"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_queries += 1
+        timings.db_seconds += time.perf_counter() - started
+
+
+def track_queries():
+    """Context manager recording queries on every database alias of this thread"""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(record_query))
+    return stack
+
+
+_MISSING = object()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def _instrument_cache(cache):
+    """Count hits and misses on one configured cache instance"""
+    if getattr(cache, '_instrumented', False):
+        return cache
+    get = cache.get
+
+    @functools.wraps(get)
+    def counted_get(key, default=None, version=None):
+        value = get(key, _MISSING, version=version)
+        timings = _current.get()
+        if timings is not None:
+            if value is _MISSING:
+                timings.cache_misses += 1
+            else:
+                timings.cache_hits += 1
+        return default if value is _MISSING else value
+
+    cache.get = counted_get
+    # BaseCache.get_many loops over get(), which is already counted
+    if type(cache).get_many is not BaseCache.get_many:
+        get_many = cache.get_many
+
+        @functools.wraps(get_many)
+        def counted_get_many(keys, version=None):
+            keys = list(keys)
+            found = get_many(keys, version=version)
+            timings = _current.get()
+            if timings is not None:
+                timings.cache_hits += len(found)
+                timings.cache_misses += len(keys) - len(found)
+            return found
+
+        cache.get_many = counted_get_many
+    cache._instrumented = True
+    return cache
+
+
+def install():
+    """
+    Count lookups on the caches configured in CACHES; idempotent.
+    Only instances handed out by django.core.cache.caches are wrapped, so
+    backends constructed elsewhere are left alone.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        create_connection = caches.create_connection
+
+        def create_instrumented_connection(alias):
+            return _instrument_cache(create_connection(alias))
+
+        caches.create_connection = create_instrumented_connection
+        for cache in caches.all(initialized_only=True):
+            _instrument_cache(cache)
+        _installed = True
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin adding representation time to the request's
+    serializer_seconds; nested serializers count towards the outermost one
+    """
+
+    def to_representation(self, instance):
+        timings = _current.get()
+        if timings is None or timings.serializer_depth:
+            return super().to_representation(instance)
+        timings.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializer_depth -= 1
+            timings.serializer_seconds += time.perf_counter() - started
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _sample_order(item):
+    """Sort key keeping a histogram's buckets in ascending le order"""
+    sample, _ = item
+    head, _, le = sample.partition('le="')
+    return head, float(le.split('"', 1)[0].replace('+Inf', 'inf')) if le else 0.0
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsStore(abc.ABC):
+    """
+    Aggregates request tallies into Prometheus series:
+    - observe() turns one request into counter and histogram increments
+    - render() produces the text exposition format
+    Subclasses store the increments.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, route, method, status, duration, timings):
+        labels = {'route': route, 'method': method}
+        deltas = defaultdict(float)
+        deltas['http_requests_total' + _labels(**labels, status=status)] += 1
+        for bound in self.buckets:
+            if duration <= bound:
+                deltas['http_request_duration_seconds_bucket' + _labels(**labels, le=f'{bound:g}')] += 1
+        deltas['http_request_duration_seconds_bucket' + _labels(**labels, le='+Inf')] += 1
+        deltas['http_request_duration_seconds_sum' + _labels(**labels)] += duration
+        deltas['http_request_duration_seconds_count' + _labels(**labels)] += 1
+        route_labels = _labels(route=route)
+        for name, value in (
+            ('http_request_db_queries_total', timings.db_queries),
+            ('http_request_db_seconds_total', timings.db_seconds),
+            ('http_request_cache_hits_total', timings.cache_hits),
+            ('http_request_cache_misses_total', timings.cache_misses),
+            ('http_request_serializer_seconds_total', timings.serializer_seconds),
+        ):
+            deltas[name + route_labels] += value
+        self.increment(deltas)
+
+    @abc.abstractmethod
+    def increment(self, deltas):
+        """Add {sample: delta} to the stored series"""
+
+    @abc.abstractmethod
+    def snapshot(self):
+        """{sample: value} for every stored series"""
+
+    def render(self):
+        groups = defaultdict(list)
+        for sample, value in self.snapshot().items():
+            name = sample.split('{', 1)[0]
+            for suffix in ('_bucket', '_sum', '_count'):
+                base = name[:-len(suffix)]
+                if name.endswith(suffix) and METRICS.get(base, ('',))[0] == 'histogram':
+                    name = base
+                    break
+            groups[name].append((sample, value))
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            samples = sorted(groups.get(name, ()), key=_sample_order)
+            lines += [f'{sample} {_format_value(value)}' for sample, value in samples]
+        # Pool gauges belong to the worker answering the scrape
+        pools = sorted(pool_stats().items())
+        if pools:
+            for key, (kind, help_text) in POOL_METRICS.items():
+                lines += [f'# HELP db_pool_{key} {help_text}', f'# TYPE db_pool_{key} {kind}']
+                lines += [
+                    f'db_pool_{key}{_labels(alias=alias)} {_format_value(stats[key])}'
+                    for alias, stats in pools if key in stats
+                ]
+        return '\n'.join(lines) + '\n'
+
+
+class LocalMetrics(MetricsStore):
+    """Per-process series for tests and single-process deployments"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._series = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def increment(self, deltas):
+        with self._lock:
+            for sample, value in deltas.items():
+                self._series[sample] += value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._series)
+
+
+class RedisMetrics(MetricsStore):
+    """
+    Series shared by every worker in one Redis hash:
+    - Each request's increments go out as one pipelined round trip
+    - Redis errors (including timeouts from ``options``) drop the request's increments
+      rather than fail the response, and scrapes answer without the stored series
+    """
+    key = 'metrics:http'
+
+    def __init__(self, location, options=None, **kwargs):
+        import redis
+
+        super().__init__(**kwargs)
+        self._client = redis_client.from_url(location, options)
+        self._errors = (redis.RedisError,)
+        self._failures = redis_client.FailureLog(logger, "Metrics store unavailable, dropping or omitting metrics")
+
+    def increment(self, deltas):
+        try:
+            with self._client.pipeline(transaction=False) as pipe:
+                for sample, value in deltas.items():
+                    if value:
+                        pipe.hincrbyfloat(self.key, sample, value)
+                pipe.execute()
+        except self._errors:
+            self._failures.record()
+
+    def snapshot(self):
+        try:
+            series = self._client.hgetall(self.key)
+        except self._errors:
+            self._failures.record()
+            return {}  # Scrape still answers; the series come back with Redis
+        return {sample.decode(): float(value) for sample, value in series.items()}
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Return the process-wide store configured by INSTRUMENTATION"""
+    global _metrics
+    if _metrics is None:
+        config = dict(getattr(settings, 'INSTRUMENTATION', {}))
+        config.pop('TOKEN', None)
+        backend = import_string(config.pop('BACKEND', 'campusdorm_project.utils.instrumentation.LocalMetrics'))
+        _metrics = backend(**{key.lower(): value for key, value in config.items()})
+    return _metrics
@@ -1,5 +1,163 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+def estimate_row_count(model, using='default'):
+    """Planner's row estimate for a model's table, or None if unavailable"""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == 'sqlite':
+                # sqlite_stat1 is filled in by ANALYZE / PRAGMA optimize
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None  # -1 means never analyzed
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin changelist paginator for large tables:
+    - Unfiltered lists use the planner's row estimate instead of COUNT(*)
+    - Filtered lists and tables under ``threshold`` rows are counted exactly
+    """
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.threshold:
+                return estimate
+        return super().count
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination over a (timestamp, id) key:
+    - ?before=<cursor> pages towards older rows
+    - ?after=<cursor> pages towards newer rows
+    - ?since=<pk> resumes after a known row (e.g. on reconnect)
+    - Results are always ordered oldest to newest
+    """
+    key_fields = ('timestamp', 'id')
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'limit'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self._get_limit(request)
+        key, forward = self.get_key(queryset, request)
+        return self.finish(self.seek(queryset, key, forward, limit + 1), limit, forward)
+
+    def get_key(self, queryset, request):
+        """Return the (timestamp, pk) seek key and direction from the query string"""
+        params = request.query_params
+        if 'since' in params:
+            return self._key_for_pk(queryset, params['since']), True
+        if 'after' in params:
+            return self.decode_cursor(params['after']), True
+        if 'before' in params:
+            return self.decode_cursor(params['before']), False
+        return None, False  # Latest page
+
+    def seek(self, queryset, key, forward, count):
+        """Fetch up to ``count`` rows past ``key``, nearest first"""
+        time_field, id_field = self.key_fields
+        if key is not None:
+            timestamp, pk = key
+            op = 'gt' if forward else 'lt'
+            condition = Q(**{f'{time_field}__{op}': timestamp})
+            if pk is not None:
+                condition |= Q(**{time_field: timestamp, f'{id_field}__{op}': pk})
+            queryset = queryset.filter(condition)
+
+        ordering = (time_field, id_field) if forward else (f'-{time_field}', f'-{id_field}')
+        return list(queryset.order_by(*ordering)[:count])
+
+    def finish(self, rows, limit, forward):
+        """Trim the look-ahead row and put the page in chronological order"""
+        self.has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            rows.reverse()
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'before': self._cursor_for(self.rows[0]) if self.rows else None,
+            'after': self._cursor_for(self.rows[-1]) if self.rows else None,
+            'has_more': self.has_more,
+        })
+
+    @staticmethod
+    def encode_cursor(timestamp, pk=None):
+        """Opaque cursor; a missing pk means 'strictly after this timestamp'"""
+        raw = f"{timestamp.isoformat()}|{'' if pk is None else pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            timestamp, pk = raw.split('|')
+            timestamp = parse_datetime(timestamp)
+            pk = int(pk) if pk else None
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, pk
+
+    def _key_for_pk(self, queryset, pk):
+        """Look up the key of a row the client already has"""
+        try:
+            key = queryset.filter(pk=pk).values_list(*self.key_fields).first()
+        except (ValueError, TypeError):
+            key = None
+        if key is None:
+            raise NotFound(self.invalid_cursor_message)
+        return key
+
+    def key_for(self, row):
+        time_field, id_field = self.key_fields
+        if isinstance(row, dict):
+            return row[time_field], row[id_field]
+        return getattr(row, time_field), getattr(row, id_field)
+
+    def _cursor_for(self, row):
+        return self.encode_cursor(*self.key_for(row))
+
+    def _get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(limit, self.max_page_size))
@@ -0,0 +1,41 @@
+import threading
+import time
+
+# Per-request Redis calls (throttling, metrics) must not stall requests on a hung server
+DEFAULT_OPTIONS = {
+    'socket_connect_timeout': 0.5,
+    'socket_timeout': 0.5,
+}
+
+
+def from_url(location, options=None):
+    """Sync Redis client for ``location``; ``options`` override DEFAULT_OPTIONS"""
+    import redis
+
+    return redis.Redis.from_url(location, **{**DEFAULT_OPTIONS, **(options or {})})
+
+
+class FailureLog:
+    """
+    Logs a recurring failure at most once per ``interval`` seconds, with its
+    traceback and how many occurrences were suppressed since the last entry
+    """
+
+    def __init__(self, logger, message, interval=60):
+        self.logger = logger
+        self.message = message
+        self.interval = interval
+        self._next = 0.0
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def record(self):
+        """Call from an except block"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next:
+                self._suppressed += 1
+                return
+            suppressed, self._suppressed = self._suppressed, 0
+            self._next = now + self.interval
+        self.logger.warning("%s (%d similar failures suppressed)", self.message, suppressed, exc_info=True)
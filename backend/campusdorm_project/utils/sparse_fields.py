@@ -0,0 +1,100 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_fields(value):
+    """'id,name,dorm.name' -> {'id': {}, 'name': {}, 'dorm': {'name': {}}}"""
+    tree = {}
+    for path in filter(None, (part.strip() for part in value.split(','))):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def related_lookups(serializer_class, fields=None, expand=(), prefix=''):
+    """
+    select_related / prefetch_related lookups needed to render ``fields``
+    (None = all) with ``expand``, from the serializer's Meta declarations
+    """
+    meta = serializer_class.Meta
+    selects, prefetches = [], []
+    for name, (kind, lookup) in getattr(meta, 'related_lookups', {}).items():
+        if fields is None or name in fields:
+            (selects if kind == 'select' else prefetches).append(prefix + lookup)
+    for name, child_class in getattr(meta, 'expandable_fields', {}).items():
+        if name in expand and (fields is None or name in fields):
+            selects.append(prefix + name)
+            child_selects, child_prefetches = related_lookups(
+                child_class,
+                (fields or {}).get(name) or None,
+                prefix=f'{prefix}{name}__'
+            )
+            selects += child_selects
+            prefetches += child_prefetches
+    return selects, prefetches
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Per-request shape of a serializer:
+    - ``fields``: tree from parse_fields(); only these fields are rendered
+    - ``expand``: names in Meta.expandable_fields rendered as nested objects
+    Meta.related_lookups maps fields to the joins they need, see related_lookups()
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self._requested_fields = fields or None
+        self._requested_expand = set(expand)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self._requested_fields
+        for name, serializer_class in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in self._requested_expand:
+                fields[name] = serializer_class(read_only=True, fields=(requested or {}).get(name) or None)
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b,rel.c and ?expand=rel for a viewset's safe actions. The queryset
+    only joins and prefetches what the requested shape renders.
+    """
+
+    @property
+    def requested_fields(self):
+        if self.request.method not in SAFE_METHODS or 'fields' not in self.request.query_params:
+            return None
+        return parse_fields(self.request.query_params['fields']) or None
+
+    @property
+    def requested_expand(self):
+        if self.request.method not in SAFE_METHODS:
+            return ()
+        expandable = getattr(self.get_serializer_class().Meta, 'expandable_fields', {})
+        names = self.request.query_params.get('expand', '').split(',')
+        return tuple(sorted({name.strip() for name in names} & expandable.keys()))
+
+    def optimize_queryset(self, queryset):
+        selects, prefetches = related_lookups(
+            self.get_serializer_class(),
+            self.requested_fields,
+            self.requested_expand
+        )
+        if selects:  # select_related() without arguments would follow every foreign key
+            queryset = queryset.select_related(*selects)
+        return queryset.prefetch_related(*prefetches)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method in SAFE_METHODS:
+            kwargs.setdefault('fields', self.requested_fields)
+            kwargs.setdefault('expand', self.requested_expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def representation_variant(self):
+        """Distinguishes cached representations of different shapes"""
+        fields = self.request.query_params.get('fields', '')
+        return f"fields={','.join(sorted(fields.split(',')))}&expand={','.join(self.requested_expand)}"
@@ -0,0 +1,123 @@
+import logging
+import math
+import threading
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+from . import redis_client
+
+logger = logging.getLogger(__name__)
+
+# GCRA: the key holds the client's theoretical arrival time (TAT) in ms. Each request
+# pushes it one emission interval further; a request is refused while that would put
+# the TAT more than one full period ahead of now. Uses the server clock so every
+# worker agrees on "now".
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + clock[2] / 1000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + interval
+local wait = new_tat - now - period
+if wait > 0 then return math.ceil(wait) end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return 0
+"""
+
+
+class LocalRateStore:
+    """In-process GCRA state for tests and single-process development"""
+    max_keys = 10000  # Expired entries are dropped once this many clients are tracked
+
+    def __init__(self, **kwargs):
+        self._tats = {}  # key -> theoretical arrival time, seconds
+        self._lock = threading.Lock()
+
+    def acquire(self, key, limit, period):
+        """0 if the request is admitted, else seconds until one would be"""
+        interval = period / limit
+        with self._lock:
+            now = time.monotonic()
+            new_tat = max(self._tats.get(key, now), now) + interval
+            wait = new_tat - now - period
+            if wait > 0:
+                return wait
+            if len(self._tats) >= self.max_keys:
+                self._tats = {k: tat for k, tat in self._tats.items() if tat > now}
+            self._tats[key] = new_tat
+            return 0
+
+
+class RedisRateStore:
+    """
+    GCRA state shared across workers:
+    - One string key per client holding its TAT, expiring when the bucket is full again
+    - Check and update run atomically in one EVALSHA round trip
+    - Redis errors (including timeouts from ``options``) admit the request rather than fail it
+    """
+
+    def __init__(self, location, options=None, **kwargs):
+        import redis
+
+        self._client = redis_client.from_url(location, options)
+        self._script = self._client.register_script(GCRA_SCRIPT)
+        self._errors = (redis.RedisError,)
+        self._failures = redis_client.FailureLog(logger, "Throttle store unavailable, admitting requests")
+
+    def acquire(self, key, limit, period):
+        """0 if the request is admitted, else seconds until one would be"""
+        try:
+            wait_ms = self._script(keys=[key], args=[period * 1000 / limit, period * 1000])
+        except self._errors:
+            self._failures.record()
+            return 0
+        return int(wait_ms) / 1000
+
+
+_store = None
+
+
+def get_rate_store():
+    """Return the process-wide store configured by THROTTLE_STORE"""
+    global _store
+    if _store is None:
+        config = dict(getattr(settings, 'THROTTLE_STORE', {}))
+        backend = import_string(config.pop('BACKEND', 'campusdorm_project.utils.throttling.LocalRateStore'))
+        _store = backend(**{key.lower(): value for key, value in config.items()})
+    return _store
+
+
+class GCRARateThrottle(throttling.SimpleRateThrottle):
+    """
+    SimpleRateThrottle on a GCRA store instead of a cached request history:
+    one atomic round trip and one small key per client, whatever the rate.
+    Bursts of up to the full rate are allowed, then requests are spaced evenly.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self._wait = get_rate_store().acquire(self.key, self.num_requests, self.duration)
+        return self._wait == 0
+
+    def wait(self):
+        return math.ceil(self._wait) if self._wait else None
+
+
+# Drop-in replacements for the DRF throttles of the same name
+class AnonRateThrottle(throttling.AnonRateThrottle, GCRARateThrottle):
+    pass
+
+
+class UserRateThrottle(throttling.UserRateThrottle, GCRARateThrottle):
+    pass
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, GCRARateThrottle):
+    pass
@@ -0,0 +1,65 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from core.models.user import User
+
+
+class JWTWebsocketAuthMixin:
+    """
+    JWT authentication for Channels consumers:
+    - Token comes from the ``token`` query parameter
+    - Principals are cached by token jti so reconnects skip the DB
+    """
+
+    async def _authenticate_user(self):
+        """Extract and validate JWT token from query parameters"""
+        query_params = parse_qs(self.scope["query_string"].decode())
+        token = query_params.get('token', [None])[0]
+        
+        if not token:
+            raise PermissionError("Missing authentication token")
+            
+        self.user = await self._get_user_from_token(token)
+        
+        if isinstance(self.user, AnonymousUser):
+            raise InvalidToken("Invalid authentication token")
+
+    async def _validate_user(self):
+        """Ensure the account may open a socket"""
+        if not self.user.is_active:
+            raise PermissionError("User account is disabled")
+            
+        if self.user.role == 'dorm_owner' and not self.user.is_verified:
+            raise PermissionError("Unverified dorm owner")
+
+    @database_sync_to_async
+    def _get_user_from_token(self, token):
+        """Retrieve user from JWT token, reusing a short-lived principal cache"""
+        try:
+            access_token = AccessToken(token)
+        except (InvalidToken, TokenError):
+            return AnonymousUser()
+
+        # Reconnects with the same token skip the user query
+        cache_key = f"ws_principal:{access_token['jti']}"
+        auth_cache = caches['auth']  # Looked up per call so overridden CACHES apply
+        user = auth_cache.get(cache_key)
+        if user is None:
+            try:
+                user = User.objects.get(id=access_token[api_settings.USER_ID_CLAIM])
+            except (KeyError, User.DoesNotExist):
+                return AnonymousUser()
+            # Never outlive the token itself
+            timeout = min(
+                settings.WEBSOCKET_PRINCIPAL_CACHE_TIMEOUT,
+                access_token['exp'] - int(timezone.now().timestamp())
+            )
+            if timeout > 0:
+                auth_cache.set(cache_key, user, timeout=timeout)
+        return user
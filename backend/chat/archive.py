@@ -0,0 +1,197 @@
+import json
+import zlib
+from collections import Counter, defaultdict
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from campusdorm_project.utils.pagination import KeysetPagination
+from .models import ChatArchiveChunk, ChatMessage, ConversationParticipant
+from .unread import badge_cache_key
+
+
+def _pack(rows):
+    return zlib.compress(json.dumps([
+        [row['id'], str(row['sender_id']), row['message'], row['timestamp'].isoformat()]
+        for row in rows
+    ]).encode())
+
+
+def unpack(chunk):
+    """Chunk rows in the same shape as hot history rows, oldest first"""
+    return [
+        {'id': pk, 'sender_id': sender_id, 'message': message, 'timestamp': parse_datetime(timestamp)}
+        for pk, sender_id, message, timestamp in json.loads(zlib.decompress(chunk.data))
+    ]
+
+
+def archive_batch(cutoff, batch_size):
+    """Move the oldest ``batch_size`` messages before ``cutoff`` into chunks"""
+    with transaction.atomic():
+        rows = list(
+            ChatMessage.objects.filter(timestamp__lt=cutoff, conversation__isnull=False)
+            .order_by('timestamp', 'id')
+            .values('id', 'conversation_id', 'sender_id', 'receiver_id', 'message', 'timestamp', 'is_read')
+            [:batch_size]
+        )
+        if not rows:
+            return 0
+
+        by_conversation = defaultdict(list)
+        unread = Counter()
+        for row in rows:
+            by_conversation[row['conversation_id']].append(row)
+            if not row['is_read']:
+                unread[(row['conversation_id'], row['receiver_id'])] += 1
+
+        ChatArchiveChunk.objects.bulk_create([
+            ChatArchiveChunk(
+                conversation_id=conversation_id,
+                first_timestamp=chunk_rows[0]['timestamp'],
+                first_message_id=chunk_rows[0]['id'],
+                last_timestamp=chunk_rows[-1]['timestamp'],
+                last_message_id=chunk_rows[-1]['id'],
+                min_message_id=min(row['id'] for row in chunk_rows),
+                max_message_id=max(row['id'] for row in chunk_rows),
+                message_count=len(chunk_rows),
+                data=_pack(chunk_rows),
+            )
+            for conversation_id, chunk_rows in by_conversation.items()
+        ])
+        index_archived(rows)
+        ChatMessage.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+        # Archived messages count as read
+        for (conversation_id, receiver_id), count in unread.items():
+            ConversationParticipant.objects.filter(
+                conversation_id=conversation_id,
+                user_id=receiver_id
+            ).update(unread_count=Greatest(F('unread_count') - count, 0))
+        keys = [badge_cache_key(receiver_id) for _, receiver_id in unread]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    return len(rows)
+
+
+# Archived messages get their own search index, filled in as they are archived, because
+# the hot table's index drops rows with them (chat/search.py searches both)
+ARCHIVE_INDEX_SQL = {
+    'sqlite': "INSERT INTO chat_archive_fts(rowid, message, conversation_id) VALUES (%s, %s, %s)",
+    'postgresql': (
+        "INSERT INTO chat_archive_search (id, document, conversation_id) "
+        "VALUES (%s, to_tsvector('simple', %s), %s)"
+    ),
+}
+
+
+def index_archived(rows):
+    """Add archived rows to the archive search index"""
+    sql = ARCHIVE_INDEX_SQL.get(connection.vendor)
+    if sql is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(row['id'], row['message'], row['conversation_id']) for row in rows])
+
+
+def archived_messages(pks, conversation_ids):
+    """{id: row} for archived messages among ``pks``, rows shaped like search results"""
+    pks = set(pks)
+    if not pks:
+        return {}
+    in_range = Q()
+    for pk in pks:
+        in_range |= Q(min_message_id__lte=pk, max_message_id__gte=pk)
+    found = {}
+    for chunk in ChatArchiveChunk.objects.filter(in_range, conversation_id__in=conversation_ids):
+        for row in unpack(chunk):
+            if row['id'] in pks:
+                found[row['id']] = {**row, 'conversation_id': chunk.conversation_id}
+    return found
+
+
+def archived_rows(conversation, key, forward, count):
+    """Up to ``count`` archived rows past ``key``, nearest first"""
+    chunks = ChatArchiveChunk.objects.filter(conversation=conversation)
+    if key is not None:
+        timestamp, pk = key
+        if forward:
+            chunks = chunks.filter(
+                Q(last_timestamp__gt=timestamp) | Q(last_timestamp=timestamp, last_message_id__gt=pk or 0)
+            )
+        else:
+            chunks = chunks.filter(
+                Q(first_timestamp__lt=timestamp) | Q(first_timestamp=timestamp, first_message_id__lt=pk or 0)
+            )
+    ordering = ('first_timestamp', 'first_message_id')
+    if not forward:
+        ordering = tuple(f'-{field}' for field in ordering)
+
+    rows = []
+    for chunk in chunks.order_by(*ordering).iterator(chunk_size=8):
+        chunk_rows = unpack(chunk) if forward else reversed(unpack(chunk))
+        for row in chunk_rows:
+            if key is None or _is_past(row, key, forward):
+                rows.append(row)
+                if len(rows) >= count:
+                    return rows
+    return rows
+
+
+def _is_past(row, key, forward):
+    timestamp, pk = key
+    if row['timestamp'] != timestamp:
+        return row['timestamp'] > timestamp if forward else row['timestamp'] < timestamp
+    if pk is None:
+        return False
+    return row['id'] > pk if forward else row['id'] < pk
+
+
+def archived_key(conversation, pk):
+    """(timestamp, id) of an archived message, or None"""
+    chunks = ChatArchiveChunk.objects.filter(
+        conversation=conversation,
+        min_message_id__lte=pk,
+        max_message_id__gte=pk
+    )
+    for chunk in chunks:
+        for row in unpack(chunk):
+            if row['id'] == pk:
+                return row['timestamp'], row['id']
+    return None
+
+
+class ChatHistoryPagination(KeysetPagination):
+    """Keyset pagination that continues from the hot table into archive chunks"""
+
+    def __init__(self, conversation):
+        self.conversation = conversation
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self._get_limit(request)
+        key, forward = self.get_key(queryset, request)
+
+        if forward:
+            # Archived rows all predate hot ones, so they come first
+            rows = archived_rows(self.conversation, key, True, limit + 1)
+            rows += self.seek(queryset, key, True, limit + 1 - len(rows))
+        else:
+            rows = self.seek(queryset, key, False, limit + 1)
+            if len(rows) <= limit:
+                older_than = self.key_for(rows[-1]) if rows else key
+                rows += archived_rows(self.conversation, older_than, False, limit + 1 - len(rows))
+
+        return self.finish(rows, limit, forward)
+
+    def _key_for_pk(self, queryset, pk):
+        try:
+            return super()._key_for_pk(queryset, pk)
+        except NotFound:
+            try:
+                key = archived_key(self.conversation, int(pk))
+            except ValueError:
+                key = None
+            if key is None:
+                raise
+            return key
@@ -0,0 +1,167 @@
+import asyncio
+import atexit
+import logging
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from channels.db import database_sync_to_async
+from .models import ChatMessage
+from .unread import increment_unread
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMessageBuffer:
+    """
+    Write-behind persistence for chat messages:
+    - Consumers broadcast first and hand the unsaved row to the buffer
+    - Rows are written with bulk_create, flushed by batch size or timer
+    - put() blocks once max_pending rows are waiting on the database
+    - Failed batches go back to the head of the queue and are retried with backoff
+    - A constraint violation only drops the offending row, not its batch
+    - drain() persists leftovers synchronously at process shutdown
+    """
+
+    def __init__(self, batch_size=100, flush_interval=0.005, max_pending=1000, max_retries=5, retry_backoff=0.05):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff  # Seconds before the first retry, doubled after each failure
+        self._pending = []
+        self._backlog = 0  # Rows queued or currently being written
+        self._loop = None
+        self._timer = None
+        self._tasks = set()
+
+    def _bind_loop(self):
+        """(Re)create asyncio primitives for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._timer = None
+            self._flush_lock = asyncio.Lock()
+            self._not_full = asyncio.Condition()
+        return loop
+
+    async def put(self, message):
+        """Queue an unsaved ChatMessage, waiting while the database is behind"""
+        loop = self._bind_loop()
+        async with self._not_full:
+            await self._not_full.wait_for(lambda: self._backlog < self.max_pending)
+            self._pending.append(message)
+            self._backlog += 1
+
+        if len(self._pending) >= self.batch_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._schedule_flush)
+
+    async def flush(self):
+        """Write every queued row in batch_size chunks, preserving order"""
+        self._bind_loop()
+        async with self._flush_lock:
+            self._cancel_timer()
+            attempts = 0
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                size = len(batch)
+                try:
+                    await database_sync_to_async(self._write_batch)(batch)
+                except Exception:
+                    # A row-by-row write may have committed (and trimmed) some rows first
+                    await self._release(size - len(batch))
+                    attempts += 1
+                    if attempts <= self.max_retries:
+                        # Already broadcast, so keep them queued (still counted in the backlog)
+                        logger.warning(
+                            "Failed to persist %d chat messages (attempt %d), retrying",
+                            len(batch), attempts, exc_info=True
+                        )
+                        self._pending[:0] = batch
+                        await asyncio.sleep(self.retry_backoff * 2 ** (attempts - 1))
+                        continue
+                    logger.exception("Lost %d chat messages after %d attempts", len(batch), attempts)
+                attempts = 0
+                await self._release(len(batch))
+
+    async def _release(self, count):
+        """Stop counting ``count`` rows against max_pending"""
+        if count:
+            async with self._not_full:
+                self._backlog -= count
+                self._not_full.notify_all()
+
+    def drain(self):
+        """Synchronously persist leftovers (registered with atexit)"""
+        batch, self._pending = self._pending, []
+        if batch:
+            try:
+                self._write_batch(batch)
+            except Exception:
+                logger.exception("Lost %d chat messages during shutdown", len(batch))
+        self._backlog = 0
+
+    def _write_batch(self, batch):
+        """
+        Write a batch, falling back to one row per transaction on a constraint
+        violation (e.g. the conversation was deleted) so only bad rows are dropped.
+        If a row-by-row write is interrupted, ``batch`` is trimmed to the unwritten rows.
+        """
+        try:
+            self._write(batch)
+            return
+        except IntegrityError:
+            if len(batch) > 1:
+                logger.warning("Chat message batch violated a constraint, writing row by row")
+        for index, message in enumerate(list(batch)):
+            try:
+                self._write([message])
+            except IntegrityError:
+                logger.exception(
+                    "Dropping chat message from user %s in conversation %s",
+                    message.sender_id, message.conversation_id
+                )
+            except Exception:
+                del batch[:index]  # Earlier rows are committed; only retry the rest
+                raise
+
+    def _write(self, batch):
+        try:
+            with transaction.atomic():
+                ChatMessage.objects.bulk_create(batch, batch_size=self.batch_size)
+                increment_unread(batch)
+        except Exception:
+            for message in batch:
+                message.pk = None  # Ids returned by the rolled-back insert aren't ours to reuse
+            raise
+
+    def _schedule_flush(self):
+        self._cancel_timer()
+        task = self._loop.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+_buffer = None
+
+
+def get_message_buffer():
+    """Return the process-wide buffer, configured from CHAT_WRITE_BUFFER"""
+    global _buffer
+    if _buffer is None:
+        config = getattr(settings, 'CHAT_WRITE_BUFFER', {})
+        _buffer = ChatMessageBuffer(
+            batch_size=config.get('BATCH_SIZE', 100),
+            flush_interval=config.get('FLUSH_INTERVAL', 0.005),
+            max_pending=config.get('MAX_PENDING', 1000),
+            max_retries=config.get('MAX_RETRIES', 5),
+            retry_backoff=config.get('RETRY_BACKOFF', 0.05),
+        )
+        atexit.register(_buffer.drain)
+    return _buffer
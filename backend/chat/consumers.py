@@ -1,22 +1,39 @@
-from datetime import timezone
+import asyncio
 import json
-from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import AnonymousUser
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from .models import ChatMessage
-from core.models.user import User
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import InvalidToken
+from campusdorm_project.utils.pagination import KeysetPagination
+from campusdorm_project.utils.websocket_auth import JWTWebsocketAuthMixin
+from .buffer import get_message_buffer
+from .models import ChatMessage, Conversation
+from .presence import get_presence
+
+# Subprotocol a client offers to receive coalesced JSON-array frames
+BATCH_SUBPROTOCOL = 'dormfinder.batch'
+
+
+class ChatConsumer(JWTWebsocketAuthMixin, AsyncWebsocketConsumer):
+    @property
+    def message_buffer(self):
+        return get_message_buffer()
+
+    @property
+    def presence(self):
+        return get_presence()
 
-class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         """Handle WebSocket connection with JWT authentication"""
         try:
             await self._authenticate_user()
             await self._validate_user()
+            await self._join_conversation()
             await self._add_to_chat_group()
-            await self.accept()
+            await self._accept()
+            await self.presence.heartbeat(self.conversation.pk, self.user.pk, self.channel_name)
+            await self._broadcast_presence('online')
         except (InvalidToken, PermissionError) as e:
             await self.close(code=4001)
         except Exception as e:
@@ -24,18 +41,32 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        if getattr(self, '_flush_timer', None) is not None:
+            self._flush_timer.cancel()
+        for task in getattr(self, '_flush_tasks', ()):
+            task.cancel()
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
                 self.room_group_name,
                 self.channel_name
             )
+            await self.presence.leave(self.conversation.pk, self.user.pk, self.channel_name)
+            await self._broadcast_presence('offline')
+        # Make sure nothing this client sent is left unpersisted
+        await self.message_buffer.flush()
 
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
         try:
-            payload = await self._validate_message(text_data)
-            await self._save_message(payload['message'])
-            await self._broadcast_message(payload)
+            payload = json.loads(text_data)
+            if payload.get('type') == 'heartbeat':
+                await self.presence.heartbeat(self.conversation.pk, self.user.pk, self.channel_name)
+                return
+
+            payload = await self._validate_message(payload)
+            message = self._build_message(payload['message'])
+            await self._broadcast_message(message)
+            await self.message_buffer.put(message)
         except json.JSONDecodeError:
             await self._send_error("Invalid JSON format")
         except KeyError:
@@ -45,42 +76,71 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def chat_message(self, event):
         """Send message to WebSocket client"""
-        await self.send(text_data=json.dumps(event['payload']))
+        await self._send_frame(event['text'])
+
+    async def presence_update(self, event):
+        """Send presence change to WebSocket client"""
+        await self._send_frame(event['text'])
 
     # Helper methods
-    async def _authenticate_user(self):
-        """Extract and validate JWT token from query parameters"""
-        query_params = parse_qs(self.scope["query_string"].decode())
-        token = query_params.get('token', [None])[0]
-        
-        if not token:
-            raise PermissionError("Missing authentication token")
-            
-        self.user = await self._get_user_from_token(token)
-        
-        if isinstance(self.user, AnonymousUser):
-            raise InvalidToken("Invalid authentication token")
-
-    async def _validate_user(self):
-        """Ensure user has permission to chat"""
-        if not self.user.is_active:
-            raise PermissionError("User account is disabled")
-            
-        if self.user.role == 'dorm_owner' and not self.user.is_verified:
-            raise PermissionError("Unverified dorm owner")
+    async def _accept(self):
+        """Accept, opting into frame batching if the client offered it"""
+        self.batching = BATCH_SUBPROTOCOL in self.scope.get('subprotocols', [])
+        if self.batching:
+            config = settings.CHAT_FRAME_BATCH
+            self._batch_window = config['WINDOW']
+            self._batch_max_events = config['MAX_EVENTS']
+            self._outbox = []
+            self._flush_timer = None
+            self._flush_tasks = set()  # Held so a pending flush isn't garbage-collected
+            await self.accept(subprotocol=BATCH_SUBPROTOCOL)
+        else:
+            await self.accept()
+
+    async def _send_frame(self, text):
+        """Send pre-serialized JSON now, or queue it for the next batch"""
+        if not self.batching:
+            await self.send(text_data=text)
+            return
+
+        self._outbox.append(text)
+        if len(self._outbox) >= self._batch_max_events:
+            await self._flush_outbox()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self._batch_window, self._schedule_flush)
+
+    def _schedule_flush(self):
+        task = asyncio.get_running_loop().create_task(self._flush_outbox())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_outbox(self):
+        """Join queued events into one array frame without re-serializing"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        texts, self._outbox = self._outbox, []
+        if texts:
+            await self.send(text_data='[' + ','.join(texts) + ']')
+
+    async def _join_conversation(self):
+        """Resolve the conversation from the URL and check membership"""
+        conversation_id = self.scope['url_route']['kwargs']['conversation_id']
+        self.conversation = await self._get_conversation(conversation_id)
+
+        if self.conversation is None:
+            raise PermissionError("Not a participant in this conversation")
 
     async def _add_to_chat_group(self):
-        """Add user to appropriate chat group"""
-        self.room_group_name = f"chat_{self.user.dorm.id}"  # Assuming user has dorm relation
+        """Add connection to the conversation's group only"""
+        self.room_group_name = self.conversation.group_name
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
 
-    async def _validate_message(self, text_data):
-        """Validate and parse incoming message"""
-        payload = json.loads(text_data)
-        
+    async def _validate_message(self, payload):
+        """Validate incoming message"""
         if len(payload.get('message', '')) > 500:
             raise ValueError("Message too long (max 500 characters)")
             
@@ -89,42 +149,61 @@ class ChatConsumer(AsyncWebsocketConsumer):
             
         return payload
 
-    async def _broadcast_message(self, payload):
+    async def _broadcast_message(self, message):
         """Send message to chat group"""
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'chat.message',
-                'payload': {
+                # Serialized once here instead of once per recipient
+                'text': json.dumps({
+                    'conversation': self.conversation.pk,
                     'sender': self.user.username,
-                    'message': payload['message'],
-                    'timestamp': str(timezone.now()),
-                }
+                    'message': message.message,
+                    'timestamp': message.timestamp.isoformat(),
+                    # Lets the client resume history after this message on reconnect
+                    'cursor': KeysetPagination.encode_cursor(message.timestamp),
+                })
+            }
+        )
+
+    async def _broadcast_presence(self, status):
+        """Tell the conversation who is online after a join or leave"""
+        online = await self.presence.online(self.conversation.pk)
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'presence.update',
+                'text': json.dumps({
+                    'type': 'presence',
+                    'user': str(self.user.pk),
+                    'status': 'online' if str(self.user.pk) in online else status,
+                    'online': online,
+                })
             }
         )
 
     async def _send_error(self, message):
         """Send error message to client"""
-        await self.send(text_data=json.dumps({
+        await self._send_frame(json.dumps({
             'type': 'error',
             'message': message
         }))
 
     @database_sync_to_async
-    def _get_user_from_token(self, token):
-        """Retrieve user from JWT token"""
-        try:
-            access_token = AccessToken(token)
-            return User.objects.get(id=access_token['user_id'])
-        except (InvalidToken, TokenError, User.DoesNotExist):
-            return AnonymousUser()
+    def _get_conversation(self, conversation_id):
+        """Fetch the conversation if the user participates in it"""
+        return Conversation.objects.filter(
+            pk=conversation_id,
+            participants=self.user
+        ).first()
 
-    @database_sync_to_async
-    def _save_message(self, message):
-        """Persist message to database"""
-        ChatMessage.objects.create(
+    def _build_message(self, message):
+        """Create an unsaved message; the write-behind buffer persists it"""
+        return ChatMessage(
+            conversation=self.conversation,
             sender=self.user,
+            receiver_id=self.conversation.other_party_id(self.user),
             message=message,
-            dorm=self.user.dorm,  # Assuming user has dorm relation
-            # Add receiver logic based on your requirements
-        )
\ No newline at end of file
+            timestamp=timezone.now(),
+        )
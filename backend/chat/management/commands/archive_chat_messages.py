@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from chat.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = "Move chat messages past the retention age into compressed archive chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHAT_ARCHIVE['MAX_AGE_DAYS'],
+                            help="Archive messages older than this many days")
+        parser.add_argument('--batch-size', type=int, default=settings.CHAT_ARCHIVE['BATCH_SIZE'],
+                            help="Messages moved per transaction")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches")
+
+    def handle(self, *args, **options):
+        # Fixed cutoff so messages aging in during the run wait for the next one
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batches = archived = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            moved = archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            batches += 1
+            archived += moved
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} messages older than {cutoff:%Y-%m-%d %H:%M} in {batches} batches"
+        ))
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from chat import buffer as chat_buffer
+from chat import presence as chat_presence
+from chat.consumers import BATCH_SUBPROTOCOL
+from chat.models import ChatMessage, Conversation
+from chat.routing import websocket_urlpatterns
+from core.models import Dorm, User
+
+USERNAME_PREFIX = 'loadtest_'
+
+
+class Command(BaseCommand):
+    help = "Load-test ChatConsumer with simulated WebSocket clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help="Concurrent sockets")
+        parser.add_argument('--conversations', type=int, default=10, help="Conversations to spread sockets over")
+        parser.add_argument('--rate', type=float, default=1.0, help="Messages per second per client")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds to send for")
+        parser.add_argument('--batch', action='store_true', help="Negotiate coalesced array frames")
+        parser.add_argument('--redis', metavar='URL', help="Use channels_redis and Redis presence at URL")
+        parser.add_argument(
+            '--use-configured-db',
+            action='store_true',
+            help=f"Run against the configured database instead of a throwaway test database; "
+                 f"creates and deletes '{USERNAME_PREFIX}*' users there"
+        )
+
+    def handle(self, *args, **options):
+        if options['redis']:
+            layer = {
+                'BACKEND': 'channels_redis.core.RedisChannelLayer',
+                'CONFIG': {'hosts': [options['redis']]},
+            }
+            presence = {'BACKEND': 'chat.presence.RedisPresence', 'LOCATION': options['redis']}
+            cache_config = settings.CACHES
+        else:
+            layer = {'BACKEND': 'channels.layers.InMemoryChannelLayer'}
+            presence = {'BACKEND': 'chat.presence.LocalPresence'}
+            # Principal and unread-badge caches must not need Redis either
+            cache_config = {
+                alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'chat_loadtest_{alias}'}
+                for alias in settings.CACHES
+            }
+
+        # Fixtures and messages go to a test database, as under the test runner
+        old_config = None if options['use_configured_db'] else setup_databases(verbosity=0, interactive=False)
+        with override_settings(CHANNEL_LAYERS={'default': layer}, CHAT_PRESENCE=presence, CACHES=cache_config):
+            # Module-level singletons pick up the overridden settings
+            chat_buffer._buffer = None
+            chat_presence._presence = None
+            try:
+                conversations = self._create_fixtures(options['conversations'])
+                stats = asyncio.run(self._run(conversations, options))
+            finally:
+                if old_config is None:
+                    User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+                else:
+                    teardown_databases(old_config, verbosity=0)
+                chat_buffer._buffer = None
+                chat_presence._presence = None
+
+        self._report(stats, options)
+
+    def _create_fixtures(self, count):
+        """One owner, student, dorm and conversation per simulated thread"""
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        conversations = []
+        for i in range(count):
+            owner = User.objects.create(
+                username=f'{USERNAME_PREFIX}owner_{i}',
+                role=User.Role.DORM_OWNER,
+                phone=f'+63917{i:07d}',
+                is_verified=True
+            )
+            student = User.objects.create(
+                username=f'{USERNAME_PREFIX}student_{i}',
+                role=User.Role.STUDENT,
+                phone=f'+63918{i:07d}',
+                school_id_number=f'NEUST-2025-{i:05d}'
+            )
+            dorm = Dorm.objects.create(
+                owner=owner,
+                name=f'Load test dorm {i}',
+                address='N/A',
+                monthly_rate=1500,
+                is_approved=True
+            )
+            conversations.append(Conversation.start(student, dorm))
+        return conversations
+
+    @staticmethod
+    def _token_for(user_id):
+        token = AccessToken()
+        token[api_settings.USER_ID_CLAIM] = str(user_id)
+        return str(token)
+
+    async def _run(self, conversations, options):
+        application = URLRouter(websocket_urlpatterns)
+        writes = {'batches': 0, 'rows': 0}
+        message_buffer = chat_buffer.get_message_buffer()
+        write = message_buffer._write
+
+        def counting_write(batch):
+            write(batch)
+            writes['batches'] += 1
+            writes['rows'] += len(batch)
+
+        message_buffer._write = counting_write
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        clients = []
+        for i in range(options['clients']):
+            conversation = conversations[i % len(conversations)]
+            user_id = conversation.student_id if i % 2 == 0 else conversation.owner_id
+            communicator = WebsocketCommunicator(
+                application,
+                f'/ws/chat/{conversation.pk}/?token={self._token_for(user_id)}',
+                subprotocols=[BATCH_SUBPROTOCOL] if options['batch'] else None
+            )
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise RuntimeError(f"Client {i} was rejected by ChatConsumer")
+            clients.append(communicator)
+        connection_memory = (tracemalloc.get_traced_memory()[0] - baseline) / len(clients)
+        tracemalloc.stop()
+
+        latencies = []
+        sent = [0]
+        frames = [0]
+        started = time.perf_counter()
+        deadline = started + options['duration']
+        interval = 1 / options['rate']
+
+        async def send_loop(index, communicator):
+            # Stagger clients so sends don't arrive in lockstep
+            await asyncio.sleep(interval * index / len(clients))
+            while time.perf_counter() < deadline:
+                await communicator.send_to(text_data=json.dumps({
+                    'message': f'lt:{time.perf_counter()}'
+                }))
+                sent[0] += 1
+                await asyncio.sleep(interval)
+
+        async def receive_loop(communicator):
+            while True:
+                # No timeout: receive_from() cancels the consumer when one expires
+                frame = json.loads(await communicator.receive_from(timeout=None))
+                frames[0] += 1
+                received_at = time.perf_counter()
+                for payload in frame if isinstance(frame, list) else [frame]:
+                    message = payload.get('message', '')
+                    if message.startswith('lt:'):
+                        latencies.append(received_at - float(message[3:]))
+
+        receivers = [asyncio.create_task(receive_loop(c)) for c in clients]
+        await asyncio.gather(*(send_loop(i, c) for i, c in enumerate(clients)))
+        await asyncio.sleep(1)  # Let in-flight messages arrive
+        elapsed = time.perf_counter() - started
+        for receiver in receivers:
+            receiver.cancel()
+        await asyncio.gather(*receivers, return_exceptions=True)
+
+        for communicator in clients:
+            await communicator.disconnect()
+        await message_buffer.flush()
+        message_buffer._write = write
+
+        return {
+            'sent': sent[0],
+            'delivered': len(latencies),
+            'frames': frames[0],
+            'elapsed': elapsed,
+            'latencies': sorted(latencies),
+            'writes': writes,
+            'connection_memory': connection_memory,
+            'persisted': await self._persisted_count(conversations),
+        }
+
+    @staticmethod
+    async def _persisted_count(conversations):
+        return await ChatMessage.objects.filter(conversation__in=conversations).acount()
+
+    def _report(self, stats, options):
+        elapsed = stats['elapsed']
+        latencies = stats['latencies']
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            p50, p95, p99 = (cuts[i] * 1000 for i in (49, 94, 98))
+        else:
+            p50 = p95 = p99 = float('nan')
+
+        layer = f"redis ({options['redis']})" if options['redis'] else 'in-memory'
+        self.stdout.write(f"Channel layer:        {layer}")
+        self.stdout.write(f"Frame batching:       {'on' if options['batch'] else 'off'}")
+        self.stdout.write(f"Clients/conversations: {options['clients']}/{options['conversations']}")
+        self.stdout.write(f"Messages sent:        {stats['sent']} ({stats['sent'] / elapsed:.1f}/s)")
+        self.stdout.write(f"Messages delivered:   {stats['delivered']} ({stats['delivered'] / elapsed:.1f}/s)")
+        self.stdout.write(f"Frames received:      {stats['frames']} ({stats['frames'] / elapsed:.1f}/s)")
+        self.stdout.write(f"Latency p50/p95/p99:  {p50:.2f} / {p95:.2f} / {p99:.2f} ms")
+        self.stdout.write(
+            f"DB writes:            {stats['writes']['batches'] / elapsed:.1f} batches/s, "
+            f"{stats['writes']['rows'] / elapsed:.1f} rows/s ({stats['persisted']} persisted)"
+        )
+        self.stdout.write(f"Memory per connection: {stats['connection_memory'] / 1024:.1f} KiB")
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_conversation'),
+        ('core', '0003_dorm_is_approved'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', 'timestamp', 'id'], name='chat_msg_conv_ts_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_chatmessage_conversation_keyset_index'),
+        ('core', '0003_dorm_is_approved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='last_read_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(condition=models.Q(('unread_count__gt', 0)), fields=['user'], name='chat_participant_unread_idx'),
+        ),
+    ]
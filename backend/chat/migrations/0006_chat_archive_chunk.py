@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_participant_unread_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchiveChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_timestamp', models.DateTimeField()),
+                ('first_message_id', models.BigIntegerField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('last_message_id', models.BigIntegerField()),
+                ('min_message_id', models.BigIntegerField()),
+                ('max_message_id', models.BigIntegerField()),
+                ('message_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField(help_text='zlib-compressed JSON rows: [id, sender_id, message, timestamp]')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_chunks', to='chat.conversation')),
+            ],
+            options={
+                'ordering': ['conversation', 'first_timestamp', 'first_message_id'],
+                'indexes': [models.Index(fields=['conversation', 'first_timestamp', 'first_message_id'], name='chat_archive_conv_key_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # External-content FTS5 table; conversation_id is indexed so MATCH can scope by it
+    """
+    CREATE VIRTUAL TABLE chat_chatmessage_fts USING fts5(
+        message, conversation_id, content='chat_chatmessage', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER chat_chatmessage_fts_ai AFTER INSERT ON chat_chatmessage BEGIN
+        INSERT INTO chat_chatmessage_fts(rowid, message, conversation_id)
+        VALUES (new.id, new.message, new.conversation_id);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_chatmessage_fts_ad AFTER DELETE ON chat_chatmessage BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, message, conversation_id)
+        VALUES ('delete', old.id, old.message, old.conversation_id);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_chatmessage_fts_au AFTER UPDATE OF message, conversation_id ON chat_chatmessage BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, message, conversation_id)
+        VALUES ('delete', old.id, old.message, old.conversation_id);
+        INSERT INTO chat_chatmessage_fts(rowid, message, conversation_id)
+        VALUES (new.id, new.message, new.conversation_id);
+    END
+    """,
+    "INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_au",
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_ai",
+    "DROP TABLE IF EXISTS chat_chatmessage_fts",
+]
+
+POSTGRES_FORWARD = [
+    # btree_gin lets one GIN index combine the conversation filter with the text match
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    """
+    CREATE INDEX chat_chatmessage_fts_gin ON chat_chatmessage
+    USING gin (conversation_id, to_tsvector('simple', message))
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS chat_chatmessage_fts_gin",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_chat_archive_chunk'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,76 @@
+import json
+import zlib
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # Contentless: archived text lives compressed in the chunks, only the index is kept
+    """
+    CREATE VIRTUAL TABLE chat_archive_fts USING fts5(
+        message, conversation_id, content=''
+    )
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS chat_archive_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE chat_archive_search (
+        id bigint PRIMARY KEY,
+        conversation_id bigint NOT NULL,
+        document tsvector NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX chat_archive_search_gin ON chat_archive_search
+    USING gin (conversation_id, document)
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP TABLE IF EXISTS chat_archive_search",
+]
+
+INSERT = {
+    'sqlite': "INSERT INTO chat_archive_fts(rowid, message, conversation_id) VALUES (%s, %s, %s)",
+    'postgresql': (
+        "INSERT INTO chat_archive_search (id, document, conversation_id) "
+        "VALUES (%s, to_tsvector('simple', %s), %s)"
+    ),
+}
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+def index_existing_chunks(apps, schema_editor):
+    """Messages archived before this index existed had already left the search index"""
+    sql = INSERT.get(schema_editor.connection.vendor)
+    if sql is None:
+        return
+    ChatArchiveChunk = apps.get_model('chat', 'ChatArchiveChunk')
+    with schema_editor.connection.cursor() as cursor:
+        for chunk in ChatArchiveChunk.objects.iterator(chunk_size=100):
+            rows = json.loads(zlib.decompress(chunk.data))
+            cursor.executemany(sql, [(pk, message, chunk.conversation_id) for pk, _, message, _ in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0007_chatmessage_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+        migrations.RunPython(index_existing_chunks, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,115 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from core.models.user import User
+from core.models.dorm import Dorm
+
+
+class Conversation(models.Model):
+    """Private thread between a student and the owner of one dorm"""
+    dorm = models.ForeignKey(Dorm, on_delete=models.CASCADE, related_name='conversations')
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='student_conversations',
+        limit_choices_to={'role': 'student'}
+    )
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='owner_conversations',
+        limit_choices_to={'role': 'dorm_owner'}
+    )
+    participants = models.ManyToManyField(
+        User,
+        through='ConversationParticipant',
+        related_name='conversations'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dorm', 'student'],
+                name='one_conversation_per_student_dorm'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.student} ↔ {self.owner} ({self.dorm.name})"
+
+    @staticmethod
+    def group_name_for(conversation_id):
+        """Channel layer group carrying this conversation's events"""
+        return f"chat_conversation_{conversation_id}"
+
+    @property
+    def group_name(self):
+        return self.group_name_for(self.pk)
+
+    def other_party_id(self, user):
+        """Receiver for messages sent by ``user``"""
+        return self.owner_id if user.pk == self.student_id else self.student_id
+
+    @classmethod
+    def start(cls, student, dorm):
+        """Get or create the student's conversation about a dorm"""
+        conversation = cls.objects.filter(dorm=dorm, student=student).first()
+        if conversation is not None:
+            return conversation  # Outside atomic(): no write lock for the common case
+        with transaction.atomic():
+            conversation, created = cls.objects.get_or_create(
+                dorm=dorm,
+                student=student,
+                defaults={'owner_id': dorm.owner_id}
+            )
+            if created:
+                ConversationParticipant.objects.bulk_create([
+                    ConversationParticipant(conversation=conversation, user_id=student.pk),
+                    ConversationParticipant(conversation=conversation, user_id=dorm.owner_id),
+                ])
+        return conversation
+
+
+class ConversationParticipant(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    joined_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized read state, maintained by chat.unread
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_message_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['conversation', 'user'],
+                name='unique_conversation_participant'
+            )
+        ]
+        indexes = [
+            # Badge lookups only touch conversations with something unread
+            models.Index(
+                fields=['user'],
+                condition=models.Q(unread_count__gt=0),
+                name='chat_participant_unread_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in conversation #{self.conversation_id}"
+
 
 class ChatMessage(models.Model):
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='messages',
+        null=True,  # Legacy rows predate conversations
+    )
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # Set at broadcast time, persisted later
     is_read = models.BooleanField(default=False)
 
     class Meta:
@@ -13,7 +117,38 @@ class ChatMessage(models.Model):
         indexes = [
             models.Index(fields=['sender', 'receiver']),
             models.Index(fields=['timestamp']),
+            # Keyset pagination of a conversation's history
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='chat_msg_conv_ts_id_idx'),
         ]
 
     def __str__(self):
         return f"{self.sender} → {self.receiver}: {self.message[:20]}"
+
+
+class ChatArchiveChunk(models.Model):
+    """
+    Compressed, append-only block of one conversation's archived messages.
+    Chunks of a conversation never overlap, so they order by their first key.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archive_chunks')
+    first_timestamp = models.DateTimeField()
+    first_message_id = models.BigIntegerField()
+    last_timestamp = models.DateTimeField()
+    last_message_id = models.BigIntegerField()
+    min_message_id = models.BigIntegerField()
+    max_message_id = models.BigIntegerField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField(help_text="zlib-compressed JSON rows: [id, sender_id, message, timestamp]")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['conversation', 'first_timestamp', 'first_message_id']
+        indexes = [
+            models.Index(
+                fields=['conversation', 'first_timestamp', 'first_message_id'],
+                name='chat_archive_conv_key_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Archive of conversation #{self.conversation_id} ({self.message_count} messages)"
@@ -0,0 +1,84 @@
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def _member(user_id, connection):
+    # One entry per socket so a second tab closing doesn't mark the user offline
+    return f"{user_id}|{connection}"
+
+
+def _user_ids(members):
+    return sorted({member.split('|', 1)[0] for member in members})
+
+
+class LocalPresence:
+    """In-memory presence registry for tests and single-process development"""
+
+    def __init__(self, ttl=60, **kwargs):
+        self.ttl = ttl
+        self._members = defaultdict(dict)  # conversation_id -> {member: expires_at}
+
+    async def heartbeat(self, conversation_id, user_id, connection):
+        self._members[conversation_id][_member(user_id, connection)] = time.time() + self.ttl
+
+    async def leave(self, conversation_id, user_id, connection):
+        self._members[conversation_id].pop(_member(user_id, connection), None)
+
+    async def online(self, conversation_id):
+        now = time.time()
+        members = self._members[conversation_id]
+        for member, expires_at in list(members.items()):
+            if expires_at <= now:
+                del members[member]
+        return _user_ids(members)
+
+
+class RedisPresence:
+    """
+    Presence shared across workers:
+    - One sorted set per conversation, scored by expiry time
+    - Heartbeats refresh the score, stale members are trimmed on read
+    """
+
+    def __init__(self, location, ttl=60, **kwargs):
+        import redis.asyncio as redis
+
+        self.ttl = ttl
+        self._client = redis.from_url(location)
+
+    @staticmethod
+    def _key(conversation_id):
+        return f"presence:conversation:{conversation_id}"
+
+    async def heartbeat(self, conversation_id, user_id, connection):
+        key = self._key(conversation_id)
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.zadd(key, {_member(user_id, connection): time.time() + self.ttl})
+            pipe.expire(key, self.ttl * 2)
+            await pipe.execute()
+
+    async def leave(self, conversation_id, user_id, connection):
+        await self._client.zrem(self._key(conversation_id), _member(user_id, connection))
+
+    async def online(self, conversation_id):
+        key = self._key(conversation_id)
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(key, '-inf', time.time())
+            pipe.zrange(key, 0, -1)
+            _, members = await pipe.execute()
+        return _user_ids(member.decode() for member in members)
+
+
+_presence = None
+
+
+def get_presence():
+    """Return the process-wide registry configured by CHAT_PRESENCE"""
+    global _presence
+    if _presence is None:
+        config = dict(getattr(settings, 'CHAT_PRESENCE', {}))
+        backend = import_string(config.pop('BACKEND', 'chat.presence.LocalPresence'))
+        _presence = backend(**{key.lower(): value for key, value in config.items()})
+    return _presence
@@ -0,0 +1,125 @@
+import base64
+import binascii
+from django.db import connection
+from rest_framework.exceptions import NotFound
+from .archive import archived_messages
+from .models import ChatMessage, ConversationParticipant
+
+SEARCH_FIELDS = ('id', 'conversation_id', 'sender_id', 'message', 'timestamp')
+
+# Both queries yield (id, score) with higher scores ranking first, over hot messages
+# and the archive's own index (chat_archive_fts / chat_archive_search, see chat/archive.py)
+SQLITE_SEARCH = """
+    SELECT id, score FROM (
+        SELECT chat_chatmessage_fts.rowid AS id,
+               -bm25(chat_chatmessage_fts, 1.0, 0.0) AS score
+        FROM chat_chatmessage_fts
+        WHERE chat_chatmessage_fts MATCH %s
+        UNION ALL
+        SELECT chat_archive_fts.rowid AS id,
+               -bm25(chat_archive_fts, 1.0, 0.0) AS score
+        FROM chat_archive_fts
+        WHERE chat_archive_fts MATCH %s
+    )
+    WHERE {seek}
+    ORDER BY score DESC, id DESC
+    LIMIT %s
+"""
+
+POSTGRES_SEARCH = """
+    WITH search AS (SELECT plainto_tsquery('simple', %s) AS query)
+    SELECT id, score FROM (
+        SELECT id, ts_rank(to_tsvector('simple', message), query) AS score
+        FROM chat_chatmessage, search
+        WHERE conversation_id = ANY(%s)
+          AND to_tsvector('simple', message) @@ query
+        UNION ALL
+        SELECT id, ts_rank(document, query) AS score
+        FROM chat_archive_search, search
+        WHERE conversation_id = ANY(%s)
+          AND document @@ query
+    ) AS matches
+    WHERE {seek}
+    ORDER BY score DESC, id DESC
+    LIMIT %s
+"""
+
+
+def encode_cursor(score, pk):
+    return base64.urlsafe_b64encode(f"{score!r}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        score, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return float(score), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise NotFound('Invalid cursor')
+
+
+def _fts5_query(terms, conversation_ids):
+    """Quote every term so user input can't inject FTS5 syntax"""
+    def quote(value):
+        return '"' + str(value).replace('"', '""') + '"'
+
+    conversations = ' OR '.join(quote(pk) for pk in conversation_ids)
+    words = ' '.join(quote(term) for term in terms)
+    return f"conversation_id : ({conversations}) AND message : ({words})"
+
+
+def _ranked_ids(query, conversation_ids, after, count):
+    seek, seek_params = '1 = 1', []
+    if after is not None:
+        seek = '(score < %s OR (score = %s AND id < %s))'
+        seek_params = [after[0], after[0], after[1]]
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query.split(), conversation_ids)
+        sql = SQLITE_SEARCH.format(seek=seek)
+        params = [match, match, *seek_params, count]
+    elif connection.vendor == 'postgresql':
+        sql = POSTGRES_SEARCH.format(seek=seek)
+        params = [query, list(conversation_ids), list(conversation_ids), *seek_params, count]
+    else:
+        # No native full-text index: newest-first scan of hot messages in the user's conversations
+        queryset = ChatMessage.objects.filter(
+            conversation_id__in=conversation_ids,
+            message__icontains=query
+        )
+        if after is not None:
+            queryset = queryset.filter(id__lt=after[1])
+        return [(pk, 0.0) for pk in queryset.order_by('-id').values_list('id', flat=True)[:count]]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search_messages(user, query, cursor=None, limit=20):
+    """
+    Ranked search over the messages of conversations ``user`` takes part in.
+    Archived messages stay searchable: archive_batch indexes their text in a
+    separate archive index as it deletes them from the hot table (whose own
+    index drops them), and matches are read back from their chunks.
+    Returns (rows, next_cursor).
+    """
+    query = query.strip()
+    conversation_ids = list(
+        ConversationParticipant.objects.filter(user=user).values_list('conversation_id', flat=True)
+    )
+    if not query or not conversation_ids:
+        return [], None
+
+    after = decode_cursor(cursor) if cursor else None
+    ranked = _ranked_ids(query, conversation_ids, after, limit + 1)
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+
+    rows = {
+        row['id']: row
+        for row in ChatMessage.objects.filter(id__in=[pk for pk, _ in ranked]).values(*SEARCH_FIELDS)
+    }
+    rows.update(archived_messages([pk for pk, _ in ranked if pk not in rows], conversation_ids))
+    results = [rows[pk] for pk, _ in ranked if pk in rows]
+    next_cursor = encode_cursor(ranked[-1][1], ranked[-1][0]) if has_more else None
+    return results, next_cursor
@@ -0,0 +1,17 @@
+from rest_framework import serializers
+from core.models import Dorm
+from .models import Conversation
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
+
+
+class ConversationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    dorm = serializers.PrimaryKeyRelatedField(queryset=Dorm.objects.filter(is_approved=True))
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'dorm', 'student', 'owner', 'created_at']
+        read_only_fields = ['student', 'owner', 'created_at']
+
+    def create(self, validated_data):
+        # Student comes from the request, owner from the dorm
+        return Conversation.start(self.context['request'].user, validated_data['dorm'])
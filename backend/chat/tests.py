@@ -1,3 +1,465 @@
-from django.test import TestCase
+import asyncio
+import base64
+import datetime
+import json
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import IntegrityError, OperationalError
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from campusdorm_project.utils.websocket_auth import JWTWebsocketAuthMixin
+from core.models import Dorm, User
+from core.tests import TEST_SERVICES, create_dorm, create_owner, create_student
+from .archive import archive_batch
+from .buffer import ChatMessageBuffer
+from .consumers import BATCH_SUBPROTOCOL, ChatConsumer
+from .models import ChatArchiveChunk, ChatMessage, Conversation, ConversationParticipant
+from .routing import websocket_urlpatterns
+from .unread import get_unread_badge, increment_unread, mark_read
 
-# Create your tests here.
+LOCMEM_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+    for alias in ('default', 'auth')
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ChatMessageBufferWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(
+            username='owner', role=User.Role.DORM_OWNER, phone='+639171234567', is_verified=True
+        )
+        cls.student = User.objects.create(
+            username='student', role=User.Role.STUDENT, phone='+639171234568', school_id_number='NEUST-2023-00111'
+        )
+        dorm = Dorm.objects.create(owner=owner, name='Dorm', address='Cabanatuan', monthly_rate=1500, is_approved=True)
+        cls.conversation = Conversation.start(cls.student, dorm)
+
+    def _message(self, text):
+        return ChatMessage(
+            conversation=self.conversation,
+            sender=self.student,
+            receiver_id=self.conversation.owner_id,
+            message=text
+        )
+
+    def test_constraint_violation_drops_only_the_bad_row(self):
+        batch = [self._message('first'), self._message(None), self._message('third')]
+        with self.assertLogs('chat.buffer', 'ERROR'):
+            ChatMessageBuffer()._write_batch(batch)
+        self.assertEqual(
+            list(ChatMessage.objects.order_by('id').values_list('message', flat=True)),
+            ['first', 'third']
+        )
+
+
+class ChatMessageBufferRetryTests(SimpleTestCase):
+    def _buffer(self, failures):
+        buffer = ChatMessageBuffer(batch_size=2, max_retries=2, retry_backoff=0)
+        buffer.written = []
+
+        def write(batch):
+            if failures:
+                failures.pop()
+                raise OperationalError('database is locked')
+            buffer.written.extend(batch)
+
+        buffer._write = write
+        return buffer
+
+    async def _put_and_flush(self, buffer, messages):
+        for message in messages:
+            await buffer.put(message)
+        await buffer.flush()
+
+    def test_transient_failure_is_retried_in_order(self):
+        buffer = self._buffer(failures=[1, 1])
+        with self.assertLogs('chat.buffer', 'WARNING'):
+            asyncio.run(self._put_and_flush(buffer, ['a', 'b', 'c']))
+        self.assertEqual(buffer.written, ['a', 'b', 'c'])
+        self.assertEqual(buffer._backlog, 0)
+
+    def test_rows_committed_before_a_row_by_row_failure_leave_the_backlog(self):
+        buffer = ChatMessageBuffer(batch_size=3, max_retries=2, retry_backoff=0)
+        buffer.written = []
+        failures = ['b']
+
+        def write(batch):
+            if len(batch) > 1:
+                raise IntegrityError('conversation deleted')
+            if batch[0] in failures:
+                failures.remove(batch[0])
+                raise OperationalError('database is locked')
+            buffer.written.extend(batch)
+
+        buffer._write = write
+        with self.assertLogs('chat.buffer', 'WARNING'):
+            asyncio.run(self._put_and_flush(buffer, ['a', 'b', 'c']))
+        self.assertEqual(buffer.written, ['a', 'b', 'c'])
+        self.assertEqual(buffer._backlog, 0)
+
+    def test_batch_is_given_up_after_max_retries(self):
+        buffer = self._buffer(failures=[1, 1, 1])
+        with self.assertLogs('chat.buffer', 'ERROR') as logs:
+            asyncio.run(self._put_and_flush(buffer, ['a', 'b', 'c']))
+        self.assertIn('Lost 2 chat messages after 3 attempts', logs.output[-1])
+        self.assertEqual(buffer.written, ['c'])
+        self.assertEqual(buffer._backlog, 0)
+
+
+@override_settings(**TEST_SERVICES)
+class MessageHistoryPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(
+            username='owner', role=User.Role.DORM_OWNER, phone='+639171234567', is_verified=True
+        )
+        cls.student = User.objects.create(
+            username='student', role=User.Role.STUDENT, phone='+639171234568', school_id_number='NEUST-2023-00111'
+        )
+        dorm = Dorm.objects.create(owner=owner, name='Dorm', address='Cabanatuan', monthly_rate=1500, is_approved=True)
+        cls.conversation = Conversation.start(cls.student, dorm)
+        # Three messages share each of the first two timestamps, so pages split ties
+        cls.base = timezone.now() - datetime.timedelta(days=1)
+        cls.messages = ChatMessage.objects.bulk_create([
+            ChatMessage(
+                conversation=cls.conversation,
+                sender=cls.student,
+                receiver_id=cls.conversation.owner_id,
+                message=f'message {i}',
+                timestamp=cls.base + datetime.timedelta(minutes=i // 3)
+            )
+            for i in range(7)
+        ])
+        cls.ids = [message.pk for message in cls.messages]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _get(self, **params):
+        return self.client.get(f'/api/v1/chat/conversations/{self.conversation.pk}/messages/', params)
+
+    def _page(self, **params):
+        response = self._get(**params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _ids(self, page):
+        return [row['id'] for row in page['results']]
+
+    def _walk_back(self):
+        """Every id reached by following 'before' from the latest page"""
+        page = self._page(limit=2)
+        ids = self._ids(page)
+        while page['has_more']:
+            page = self._page(limit=2, before=page['before'])
+            ids = self._ids(page) + ids
+        return ids
+
+    def _walk_forward(self, since):
+        page = self._page(limit=2, since=since)
+        ids = self._ids(page)
+        while page['has_more']:
+            page = self._page(limit=2, after=page['after'])
+            ids += self._ids(page)
+        return ids
+
+    def test_paging_back_through_ties_visits_every_message_once(self):
+        self.assertEqual(self._walk_back(), self.ids)
+
+    def test_paging_forward_through_ties_resumes_after_since(self):
+        self.assertEqual(self._walk_forward(self.ids[1]), self.ids[2:])
+
+    def test_latest_page_is_chronological(self):
+        page = self._page(limit=3)
+        self.assertEqual(self._ids(page), self.ids[-3:])
+        self.assertTrue(page['has_more'])
+        self.assertFalse(self._page(after=page['after'])['results'])
+
+    def test_tampered_cursors_are_rejected(self):
+        def encode(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode()
+
+        for params in (
+            {'before': 'not base64!'},
+            {'before': encode('yesterday|1')},
+            {'after': encode(f'{self.base.isoformat()}|one')},
+            {'after': encode('no separator')},
+            {'since': 'abc'},
+            {'since': max(self.ids) + 100},
+        ):
+            with self.subTest(**params):
+                self.assertEqual(self._get(**params).status_code, 404)
+
+    def test_paging_continues_into_archived_messages(self):
+        # The first two timestamps (six messages) move to a chunk; the last stays hot
+        archive_batch(self.base + datetime.timedelta(minutes=2), batch_size=100)
+        self.assertEqual(ChatArchiveChunk.objects.get().message_count, 6)
+        self.assertEqual(list(ChatMessage.objects.values_list('id', flat=True)), self.ids[-1:])
+
+        self.assertEqual(self._walk_back(), self.ids)
+        self.assertEqual(self._walk_forward(self.ids[1]), self.ids[2:])
+
+
+@override_settings(**TEST_SERVICES)
+class MessageSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(
+            username='owner', role=User.Role.DORM_OWNER, phone='+639171234567', is_verified=True
+        )
+        cls.student = User.objects.create(
+            username='student', role=User.Role.STUDENT, phone='+639171234568', school_id_number='NEUST-2023-00111'
+        )
+        cls.outsider = User.objects.create(
+            username='outsider', role=User.Role.STUDENT, phone='+639171234569', school_id_number='NEUST-2023-00112'
+        )
+        dorm = Dorm.objects.create(owner=owner, name='Dorm', address='Cabanatuan', monthly_rate=1500, is_approved=True)
+        cls.conversation = Conversation.start(cls.student, dorm)
+        cls.other_conversation = Conversation.start(cls.outsider, dorm)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _send(self, text, conversation=None, days_ago=0):
+        conversation = conversation or self.conversation
+        return ChatMessage.objects.create(
+            conversation=conversation,
+            sender=conversation.student,
+            receiver_id=conversation.owner_id,
+            message=text,
+            timestamp=timezone.now() - datetime.timedelta(days=days_ago)
+        ).pk
+
+    def _search(self, q, **params):
+        response = self.client.get('/api/v1/chat/conversations/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _ids(self, page):
+        return [row['id'] for row in page['results']]
+
+    def test_closer_matches_rank_first(self):
+        loose = self._send('please send the rent receipt for last month when you can')
+        close = self._send('rent receipt')
+        self._send('curfew is at ten')
+        self.assertEqual(self._ids(self._search('rent receipt')), [close, loose])
+
+    def test_only_the_callers_conversations_are_searched(self):
+        mine = self._send('wifi password please')
+        self._send('wifi password please', conversation=self.other_conversation)
+        self.assertEqual(self._ids(self._search('wifi password')), [mine])
+
+    def test_paging_through_equal_scores_visits_every_match_once(self):
+        ids = [self._send('laundry day') for _ in range(5)]
+        page = self._search('laundry', limit=2)
+        found = self._ids(page)
+        while page['next']:
+            page = self._search('laundry', limit=2, cursor=page['next'])
+            found += self._ids(page)
+        self.assertEqual(found, sorted(ids, reverse=True))
+
+    def test_archived_messages_stay_searchable(self):
+        old = self._send('deposit refund for the aircon room', days_ago=200)
+        recent = self._send('deposit is due friday')
+        self._send('deposit refund', conversation=self.other_conversation, days_ago=200)
+        archive_batch(timezone.now() - datetime.timedelta(days=90), batch_size=100)
+        self.assertFalse(ChatMessage.objects.filter(pk=old).exists())
+
+        page = self._search('deposit')
+        self.assertEqual(sorted(self._ids(page)), sorted([old, recent]))
+        [archived] = [row for row in page['results'] if row['id'] == old]
+        self.assertEqual(
+            (archived['conversation'], archived['message']),
+            (self.conversation.pk, 'deposit refund for the aircon room')
+        )
+
+
+@override_settings(CHAT_FRAME_BATCH={'WINDOW': 0.01, 'MAX_EVENTS': 3})
+class ChatFrameBatchingTests(SimpleTestCase):
+    async def _frames(self, subprotocols, count, disconnect=False):
+        consumer = ChatConsumer()
+        consumer.scope = {'subprotocols': subprotocols}
+        consumer.accept = mock.AsyncMock()
+        consumer.send = mock.AsyncMock()
+        await consumer._accept()
+        for i in range(count):
+            await consumer._send_frame(json.dumps({'n': i}))
+        if disconnect:
+            consumer._schedule_flush()  # As if the window just closed
+            await consumer.disconnect(1000)
+        await asyncio.sleep(0.05)
+        return consumer.accept.await_args, [call.kwargs['text_data'] for call in consumer.send.await_args_list]
+
+    def test_events_are_sent_one_per_frame_by_default(self):
+        accepted, frames = asyncio.run(self._frames([], 2))
+        self.assertEqual(accepted, mock.call())
+        self.assertEqual(frames, ['{"n": 0}', '{"n": 1}'])
+
+    def test_opted_in_clients_get_array_frames(self):
+        accepted, frames = asyncio.run(self._frames(['other', BATCH_SUBPROTOCOL], 4))
+        self.assertEqual(accepted, mock.call(subprotocol=BATCH_SUBPROTOCOL))
+        # MAX_EVENTS flushes the first three at once; the window sends the rest
+        self.assertEqual([json.loads(frame) for frame in frames], [[{'n': 0}, {'n': 1}, {'n': 2}], [{'n': 3}]])
+
+    def test_disconnect_drops_a_scheduled_flush(self):
+        _, frames = asyncio.run(self._frames([BATCH_SUBPROTOCOL], 1, disconnect=True))
+        self.assertEqual(frames, [])
+
+
+def access_token(user, lifetime=None):
+    token = AccessToken()
+    token[api_settings.USER_ID_CLAIM] = str(user.pk)
+    if lifetime is not None:
+        token.set_exp(lifetime=lifetime)
+    return str(token)
+
+
+@override_settings(**TEST_SERVICES)
+class ConversationAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.student = create_student()
+        cls.dorm = create_dorm(cls.owner)
+        cls.conversation = Conversation.start(cls.student, cls.dorm)
+
+    async def _connect(self, token):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns),
+            f'/ws/chat/{self.conversation.pk}/?token={token}'
+        )
+        connected, code = await communicator.connect()
+        await communicator.disconnect()
+        return connected, code
+
+    def test_participants_can_join(self):
+        connected, _ = async_to_sync(self._connect)(access_token(self.student))
+        self.assertTrue(connected)
+
+    def test_non_participants_are_refused(self):
+        outsider = create_student('outsider', '+639171234569', 'NEUST-2023-00112')
+        self.assertEqual(async_to_sync(self._connect)(access_token(outsider)), (False, 4001))
+        self.assertEqual(async_to_sync(self._connect)('not-a-token'), (False, 4001))
+
+    def test_restarting_a_conversation_only_reads(self):
+        with self.assertNumQueries(1):  # No atomic(), which takes SQLite's write lock
+            self.assertEqual(Conversation.start(self.student, self.dorm), self.conversation)
+
+    def test_conversations_only_start_on_approved_dorms(self):
+        client = APIClient()
+        client.force_authenticate(create_student('other', '+639171234569', 'NEUST-2023-00112'))
+        hidden = Dorm.objects.create(owner=self.owner, name='Hidden', address='Cabanatuan', monthly_rate=1500)
+        response = client.post('/api/v1/chat/conversations/', {'dorm': hidden.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('dorm', response.json())
+
+        response = client.post('/api/v1/chat/conversations/', {'dorm': self.dorm.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['owner'], str(self.owner.pk))
+
+
+@override_settings(**TEST_SERVICES)
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.student = create_student()
+        cls.conversation = Conversation.start(cls.student, create_dorm(cls.owner))
+
+    def setUp(self):
+        cache.clear()
+
+    def _send(self, count):
+        messages = ChatMessage.objects.bulk_create([
+            ChatMessage(
+                conversation=self.conversation,
+                sender=self.student,
+                receiver=self.owner,
+                message=f'message {i}'
+            )
+            for i in range(count)
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            increment_unread(messages)
+        return messages
+
+    def _unread(self, user):
+        return ConversationParticipant.objects.get(conversation=self.conversation, user=user).unread_count
+
+    def _mark_read(self, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            return mark_read(self.conversation, self.owner, message.pk)
+
+    def test_inserts_count_towards_the_receiver_only(self):
+        self._send(3)
+        self.assertEqual(self._unread(self.owner), 3)
+        self.assertEqual(self._unread(self.student), 0)
+
+    def test_mark_read_up_to_a_message(self):
+        messages = self._send(3)
+        self.assertEqual(self._mark_read(messages[1]), 2)
+        self.assertEqual(self._unread(self.owner), 1)
+        self.assertEqual(
+            list(ChatMessage.objects.filter(is_read=False).values_list('pk', flat=True)),
+            [messages[2].pk]
+        )
+
+        # Marking an earlier message again changes nothing
+        self.assertEqual(self._mark_read(messages[0]), 0)
+        membership = ConversationParticipant.objects.get(conversation=self.conversation, user=self.owner)
+        self.assertEqual((membership.unread_count, membership.last_read_message_id), (1, messages[1].pk))
+
+    def test_badge_is_cached_until_counters_change(self):
+        self._send(2)
+        expected = {'total': 2, 'conversations': {self.conversation.pk: 2}}
+        self.assertEqual(get_unread_badge(self.owner), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_badge(self.owner), expected)
+
+        messages = self._send(1)
+        self.assertEqual(get_unread_badge(self.owner)['total'], 3)
+        self._mark_read(messages[0])
+        self.assertEqual(get_unread_badge(self.owner), {'total': 0, 'conversations': {}})
+
+
+@override_settings(WEBSOCKET_PRINCIPAL_CACHE_TIMEOUT=30, **TEST_SERVICES)
+class PrincipalCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = create_student()
+
+    def setUp(self):
+        caches['auth'].clear()
+
+    def _authenticate(self, token):
+        with mock.patch.object(caches['auth'], 'set', wraps=caches['auth'].set) as cache_set:
+            user = async_to_sync(JWTWebsocketAuthMixin()._get_user_from_token)(token)
+        return user, [call.kwargs['timeout'] for call in cache_set.call_args_list]
+
+    def test_reconnects_reuse_the_cached_principal(self):
+        token = access_token(self.student)
+        user, timeouts = self._authenticate(token)
+        self.assertEqual((user, timeouts), (self.student, [30]))
+        with self.assertNumQueries(0):
+            user, timeouts = self._authenticate(token)
+        self.assertEqual((user, timeouts), (self.student, []))
+
+    def test_cache_never_outlives_the_token(self):
+        _, timeouts = self._authenticate(access_token(self.student, datetime.timedelta(seconds=10)))
+        self.assertEqual(len(timeouts), 1)
+        self.assertIn(timeouts[0], (9, 10))
+
+    def test_expired_tokens_are_anonymous(self):
+        user, timeouts = self._authenticate(access_token(self.student, datetime.timedelta(seconds=-1)))
+        self.assertFalse(user.is_authenticated)
+        self.assertEqual(timeouts, [])
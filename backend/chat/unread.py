@@ -0,0 +1,74 @@
+from collections import Counter
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce, Greatest
+from .models import ChatMessage, ConversationParticipant
+
+BADGE_CACHE_TIMEOUT = 300  # Invalidated on every counter change anyway
+
+
+def badge_cache_key(user_id):
+    return f'chat_unread:{user_id}'
+
+
+def increment_unread(messages):
+    """Bump receivers' counters for newly inserted messages, one UPDATE per pair"""
+    counts = Counter(
+        (message.conversation_id, message.receiver_id)
+        for message in messages
+        if message.conversation_id is not None
+    )
+    for (conversation_id, receiver_id), count in counts.items():
+        ConversationParticipant.objects.filter(
+            conversation_id=conversation_id,
+            user_id=receiver_id
+        ).update(unread_count=F('unread_count') + count)
+
+    keys = [badge_cache_key(receiver_id) for _, receiver_id in counts]
+    # Invalidate after commit so a concurrent read can't re-cache stale counts
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def mark_read(conversation, user, message_id):
+    """Mark everything up to and including ``message_id`` as read"""
+    key = ChatMessage.objects.filter(
+        conversation=conversation,
+        pk=message_id
+    ).values_list('timestamp', 'id').first()
+    if key is None:
+        raise ChatMessage.DoesNotExist(message_id)
+
+    timestamp, pk = key
+    marked = ChatMessage.objects.filter(
+        Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lte=pk),
+        conversation=conversation,
+        receiver=user,
+        is_read=False
+    ).update(is_read=True)
+
+    ConversationParticipant.objects.filter(
+        conversation=conversation,
+        user=user
+    ).update(
+        unread_count=Greatest(F('unread_count') - marked, 0),
+        last_read_message_id=Greatest(Coalesce(F('last_read_message_id'), 0), pk)
+    )
+    transaction.on_commit(lambda: cache.delete(badge_cache_key(user.pk)))
+    return marked
+
+
+def get_unread_badge(user):
+    """Per-conversation unread counts for badges, served from cache"""
+    key = badge_cache_key(user.pk)
+    badge = cache.get(key)
+    if badge is None:
+        conversations = dict(
+            ConversationParticipant.objects.filter(
+                user=user,
+                unread_count__gt=0
+            ).values_list('conversation_id', 'unread_count')
+        )
+        badge = {'total': sum(conversations.values()), 'conversations': conversations}
+        cache.set(key, badge, BADGE_CACHE_TIMEOUT)
+    return badge
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from core.urls import API_VERSION
+from . import views
+
+router = DefaultRouter(trailing_slash=True)
+router.register(r'conversations', views.ConversationViewSet, basename='conversation')
+
+urlpatterns = [
+    path(f'api/{API_VERSION}/chat/', include(router.urls)),
+]
@@ -1,3 +1,102 @@
-from django.shortcuts import render
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from campusdorm_project.utils.db_routing import ReplicaReadMixin
+from core.permissions import IsStudent
+from .archive import ChatHistoryPagination
+from .models import ChatMessage, Conversation
+from .search import search_messages
+from .serializers import ConversationSerializer
+from .unread import get_unread_badge, mark_read
 
-# Create your views here.
+# Compact history rows: no serializer pass, no joins
+HISTORY_FIELDS = ('id', 'sender_id', 'message', 'timestamp')
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+class ConversationViewSet(ReplicaReadMixin,
+                          mixins.CreateModelMixin,
+                          mixins.ListModelMixin,
+                          mixins.RetrieveModelMixin,
+                          viewsets.GenericViewSet):
+    """
+    Conversations the current user participates in; students start them
+    """
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+    replica_actions = ('messages',)  # History tolerates lag; read/unread state doesn't
+
+    def get_permissions(self):
+        if self.action == 'create':
+            return [IsAuthenticated(), IsStudent()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        return Conversation.objects.filter(participants=self.request.user).select_related('dorm')
+
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        """Message history paged by (timestamp, id) cursor across hot and archived tiers"""
+        conversation = self.get_object()
+        queryset = ChatMessage.objects.filter(conversation=conversation).values(*HISTORY_FIELDS)
+
+        paginator = ChatHistoryPagination(conversation)
+        rows = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response([
+            {
+                'id': row['id'],
+                'sender': row['sender_id'],
+                'message': row['message'],
+                'timestamp': row['timestamp'],
+            }
+            for row in rows
+        ])
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Mark messages up to ``message`` as read in one UPDATE"""
+        conversation = self.get_object()
+        message_id = request.data.get('message')
+        try:
+            marked = mark_read(conversation, request.user, int(message_id))
+        except (TypeError, ValueError, ChatMessage.DoesNotExist):
+            return Response(
+                {'errors': {'message': ['Unknown message in this conversation']}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'marked': marked})
+
+    @action(detail=False, methods=['get'])
+    def unread(self, request):
+        """Unread badge counts for the current user"""
+        return Response(get_unread_badge(request.user))
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search across the user's conversations"""
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', SEARCH_PAGE_SIZE)), SEARCH_MAX_PAGE_SIZE))
+        except ValueError:
+            limit = SEARCH_PAGE_SIZE
+
+        results, next_cursor = search_messages(
+            request.user,
+            request.query_params.get('q', ''),
+            cursor=request.query_params.get('cursor'),
+            limit=limit
+        )
+        return Response({
+            'results': [
+                {
+                    'id': row['id'],
+                    'conversation': row['conversation_id'],
+                    'sender': row['sender_id'],
+                    'message': row['message'],
+                    'timestamp': row['timestamp'],
+                }
+                for row in results
+            ],
+            'next': next_cursor,
+        })
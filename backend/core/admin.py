@@ -3,7 +3,18 @@ from django.contrib import admin
 # Register your models here.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Dorm, Booking, Review, Payment, Amenity
+from campusdorm_project.utils.pagination import EstimatedCountPaginator
+from .models import User, Dorm, Booking, Review, Payment, Amenity, PaymentWebhookEvent
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist defaults for tables that grow with usage:
+    - Page counts come from planner estimates once the table is big
+    - No second COUNT(*) over the whole table when filters are applied
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'role', 'phone', 'school_id_number', 'is_verified')
@@ -37,31 +48,45 @@ class DormAdmin(admin.ModelAdmin):
     list_filter = ('owner', 'monthly_rate')
     search_fields = ('name', 'address')
     raw_id_fields = ('owner', 'amenities')
+    list_select_related = ('owner',)
     
     # PH-specific default filters
     list_filter = ('monthly_rate', 'distance_from_school')
 
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(LargeTableAdmin):
     list_display = ('user', 'dorm', 'move_in_date', 'status', 'created_at')
     list_filter = ('status', 'move_in_date')
     raw_id_fields = ('user', 'dorm')
+    list_select_related = ('user', 'dorm')
     
     # PH academic calendar awareness
     date_hierarchy = 'move_in_date'
+    # Drilldown pages walk booking_move_in_id_idx instead of sorting
+    ordering = ('-move_in_date', '-id')
 
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdmin):
     list_display = ('user', 'dorm', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
     raw_id_fields = ('user', 'dorm')
+    list_select_related = ('user', 'dorm')
 
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdmin):
     list_display = ('booking', 'amount', 'method', 'is_verified', 'created_at')
     list_filter = ('method', 'is_verified')
     search_fields = ('reference_number',)
+    # Booking.__str__ reads the dorm name
+    list_select_related = ('booking__dorm',)
+    raw_id_fields = ('booking',)
     
     # PH currency formatting
     readonly_fields = ('amount',)
 
+class PaymentWebhookEventAdmin(LargeTableAdmin):
+    list_display = ('event_id', 'provider', 'event_type', 'status', 'attempts', 'received_at')
+    list_filter = ('status', 'provider')
+    search_fields = ('event_id',)
+    readonly_fields = ('provider', 'event_id', 'event_type', 'payload', 'received_at', 'processed_at')
+
 class AmenityAdmin(admin.ModelAdmin):
     list_display = ('name', 'icon')
     search_fields = ('name',)
@@ -73,6 +98,7 @@ admin.site.register(Booking, BookingAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Payment, PaymentAdmin)
 admin.site.register(Amenity, AmenityAdmin)
+admin.site.register(PaymentWebhookEvent, PaymentWebhookEventAdmin)
 
 # Optional: Customize admin site header for PH context
 admin.site.site_header = "NEUST DormFinder Administration"
@@ -0,0 +1,93 @@
+from datetime import date, timedelta
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from core.models import DailyDormStats
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+class AdminAnalyticsView(APIView):
+    """
+    Booking, occupancy and revenue trends aggregated from DailyDormStats only.
+    Query params: start, end (YYYY-MM-DD, inclusive), dorm, group (day|week|month)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            end = date.fromisoformat(params['end']) if 'end' in params else timezone.localdate()
+            start = date.fromisoformat(params['start']) if 'start' in params else end - timedelta(days=90)
+        except ValueError:
+            return Response(
+                {'errors': {'dates': ['Use YYYY-MM-DD']}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end:
+            return Response(
+                {'errors': {'dates': ['start must not be after end']}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            dorm = int(params['dorm']) if 'dorm' in params else None
+        except ValueError:
+            return Response(
+                {'errors': {'dorm': ['Must be a dorm ID']}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        group = params.get('group', 'week')
+        if group not in PERIODS:
+            return Response(
+                {'errors': {'group': [f"Choose one of {', '.join(PERIODS)}"]}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = DailyDormStats.objects.filter(date__gte=start, date__lte=end)
+        if dorm is not None:
+            queryset = queryset.filter(dorm_id=dorm)
+
+        rows = (
+            queryset.annotate(period=PERIODS[group]('date'))
+            .values('period')
+            .annotate(
+                bookings_created=Sum('bookings_created'),
+                occupied_booking_days=Sum('occupied_bookings'),
+                payments_verified=Sum('payments_verified'),
+                revenue_cash=Sum('revenue_cash'),
+                revenue_gcash=Sum('revenue_gcash'),
+                revenue_bank_transfer=Sum('revenue_bank_transfer'),
+            )
+            .order_by('period')
+        )
+        return Response({
+            'start': start,
+            'end': end,
+            'group': group,
+            'results': [self._with_occupancy(row, group, start, end) for row in rows],
+        })
+
+    @staticmethod
+    def _with_occupancy(row, group, start, end):
+        """Average daily occupied bookings over the part of the period inside the range"""
+        period_start = row['period']
+        if hasattr(period_start, 'date'):
+            period_start = period_start.date()
+        if group == 'day':
+            period_end = period_start
+        elif group == 'week':
+            period_end = period_start + timedelta(days=6)
+        else:
+            next_month = (period_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            period_end = next_month - timedelta(days=1)
+        days = (min(period_end, end) - max(period_start, start)).days + 1
+        row['period'] = period_start
+        row['average_occupied_bookings'] = round(row['occupied_booking_days'] / days, 2)
+        return row
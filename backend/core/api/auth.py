@@ -7,13 +7,13 @@ from django.middleware.csrf import get_token
 from rest_framework import generics, permissions, status, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from rest_framework.throttling import ScopedRateThrottle
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework.generics import RetrieveAPIView
 from core.models import User
 from core.serializers import CustomTokenObtainPairSerializer
 from core.serializers.user_serializers import UserProfileSerializer
+from campusdorm_project.utils.throttling import ScopedRateThrottle
 
 logger = logging.getLogger(__name__)
 AUTH_CACHE = caches[settings.SIMPLE_JWT.get('REVOCATION_CACHE', 'default')]
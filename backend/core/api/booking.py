@@ -5,8 +5,10 @@ from rest_framework.permissions import IsAuthenticated
 from core.models import Booking
 from core.serializers.booking_serializers import BookingSerializer
 from core.permissions import IsStudent
+from campusdorm_project.utils.conditional import ConditionalGetMixin
+from campusdorm_project.utils.sparse_fields import SparseFieldsMixin
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Handles student dorm bookings with conflict checking and transaction safety
     """
@@ -14,8 +16,8 @@ class BookingViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def get_queryset(self):
-        """Return bookings for current student with related data"""
-        return Booking.objects.filter(user=self.request.user).select_related('dorm', 'user')
+        """Return bookings for current student, joining only what ?fields/?expand render"""
+        return self.optimize_queryset(Booking.objects.filter(user=self.request.user))
 
     def create(self, request, *args, **kwargs):
         """Atomic booking creation with conflict checking"""
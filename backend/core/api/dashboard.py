@@ -0,0 +1,33 @@
+from decimal import Decimal
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from core.models import DormSummary
+from core.serializers.dashboard_serializers import DormSummarySerializer
+from core.permissions import IsDormOwnerUser
+
+class OwnerDashboardView(APIView):
+    """
+    Occupancy, pending approvals, revenue and ratings across the owner's dorms,
+    read from precomputed DormSummary rows in a single query
+    """
+    permission_classes = [IsAuthenticated, IsDormOwnerUser]
+
+    def get(self, request):
+        summaries = list(
+            DormSummary.objects.filter(owner=request.user).select_related('dorm').order_by('dorm__name')
+        )
+        review_count = sum(s.review_count for s in summaries)
+        return Response({
+            'totals': {
+                'dorms': len(summaries),
+                'pending_bookings': sum(s.pending_bookings for s in summaries),
+                'confirmed_bookings': sum(s.confirmed_bookings for s in summaries),
+                'confirmed_revenue': sum((s.confirmed_revenue for s in summaries), Decimal('0')),
+                'average_rating': (
+                    round(sum(s.rating_total for s in summaries) / review_count, 2)
+                    if review_count else None
+                ),
+            },
+            'dorms': DormSummarySerializer(summaries, many=True).data,
+        })
@@ -1,18 +1,28 @@
+from rest_framework import status
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
+from rest_framework.response import Response
 from core.models import Dorm
 from core.serializers import dorm_serializers
 from core.permissions import IsDormOwner
+from campusdorm_project.utils.conditional import ConditionalGetMixin
+from campusdorm_project.utils.db_routing import ReplicaReadMixin
+from campusdorm_project.utils.representation_cache import CachedRepresentationMixin
+from campusdorm_project.utils.sparse_fields import SparseFieldsMixin
 
-class DormViewSet(ModelViewSet):
+class DormViewSet(ConditionalGetMixin, SparseFieldsMixin, CachedRepresentationMixin, ReplicaReadMixin, ModelViewSet):
     serializer_class = dorm_serializers.DormSerializer
     permission_classes = [IsDormOwner]
     filterset_fields = ['monthly_rate', 'distance_from_school']
     ordering_fields = ['created_at', 'monthly_rate']
+    representation_cache_prefix = 'dorm'
+    conditional_permission_fields = ('owner',)  # IsDormOwner compares owner_id
+    replica_actions = ('list', 'retrieve', 'batch')
+    batch_max_ids = 50
 
     def get_queryset(self):
         """Filter queryset based on PH location preferences"""
-        queryset = Dorm.objects.filter(is_approved=True)
+        queryset = self.optimize_queryset(Dorm.objects.filter(is_approved=True))
         
         # PH-specific distance filtering
         if 'max_walk_time' in self.request.query_params:
@@ -34,4 +44,24 @@ class DormViewSet(ModelViewSet):
         dorm = self.get_object()
         dorm.ph_verified = True
         dorm.save()
-        return Response({'status': 'NEUST Verified dorm'})
\ No newline at end of file
+        return Response({'status': 'NEUST Verified dorm'})
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """Dorms for ?ids=1,2,3 in the requested order; unknown or unapproved ids are skipped"""
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()))
+        except ValueError:
+            return Response({'errors': {'ids': ['Must be a comma-separated list of dorm IDs']}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'errors': {'ids': ['This parameter is required']}}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.batch_max_ids:
+            return Response({'errors': {'ids': [f'At most {self.batch_max_ids} dorms per request']}},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        dorms = {dorm.pk: dorm for dorm in self.get_queryset().filter(pk__in=ids)}
+        ordered = [dorms[pk] for pk in ids if pk in dorms]
+        for dorm in ordered:
+            self.check_object_permissions(request, dorm)
+        return Response(self.get_serializer(ordered, many=True).data)
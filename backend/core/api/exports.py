@@ -0,0 +1,43 @@
+from datetime import date
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from core.exports import FORMATS, async_chunks, export_rows
+
+class ExportView(APIView):
+    """
+    Streams every matching booking or payment as CSV or JSON Lines.
+    Query params: start, end (YYYY-MM-DD, inclusive, on created_at), dorm, status
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, kind, file_format):
+        if file_format not in FORMATS:
+            return Response(
+                {'errors': {'format': [f"Choose one of {', '.join(FORMATS)}"]}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        params = request.query_params
+        try:
+            header, rows = export_rows(
+                kind,
+                start=date.fromisoformat(params['start']) if 'start' in params else None,
+                end=date.fromisoformat(params['end']) if 'end' in params else None,
+                dorm=params.get('dorm'),
+                status=params.get('status'),
+            )
+        except ValueError as exc:
+            return Response({'errors': {'export': [str(exc)]}}, status=status.HTTP_400_BAD_REQUEST)
+
+        encode, content_type = FORMATS[file_format]
+        chunks = encode(header, rows)
+        if isinstance(request._request, ASGIRequest):
+            chunks = async_chunks(chunks)  # Django's ASGI handler buffers sync iterators whole
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        filename = f"{kind}-{timezone.localdate():%Y%m%d}.{file_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,24 @@
+from django.http import HttpResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from core.permissions import HasMetricsToken
+from campusdorm_project.utils.db_pool import pool_stats
+from campusdorm_project.utils.instrumentation import get_metrics
+
+class DatabasePoolView(APIView):
+    """Connection pool gauges for the worker process serving this request"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'pools': pool_stats()})
+
+
+class MetricsView(APIView):
+    """Per-route request metrics in the Prometheus text format"""
+    authentication_classes = []  # Scrapers send the metrics token, not a user JWT
+    permission_classes = [HasMetricsToken]
+    throttle_classes = []
+
+    def get(self, request):
+        return HttpResponse(get_metrics().render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,39 @@
+import io
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from core.models import Payment
+from core.reconciliation import reconcile_statement
+
+class PaymentReconciliationView(APIView):
+    """
+    Upload a GCash/bank statement CSV to verify matching payments in bulk.
+    Form fields: file, method, optional reference_column, amount_column, dry_run
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        statement = request.FILES.get('file')
+        method = request.data.get('method')
+        errors = {}
+        if statement is None:
+            errors['file'] = ['Upload the statement as a CSV file']
+        if method not in dict(Payment.METHOD_CHOICES) or method == 'cash':
+            errors['method'] = ['Choose gcash or bank_transfer']
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = reconcile_statement(
+                io.TextIOWrapper(statement.file, encoding='utf-8-sig', newline=''),
+                method,
+                reference_column=request.data.get('reference_column', 'reference_number'),
+                amount_column=request.data.get('amount_column', 'amount'),
+                dry_run=request.data.get('dry_run') in ('1', 'true', 'True'),
+            )
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'errors': {'file': [str(exc)]}}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
@@ -0,0 +1,44 @@
+import json
+from django.db import transaction
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from core.webhooks import SIGNATURE_HEADER, get_secret, get_webhook_queue, record_event, verify_signature
+
+class PaymentWebhookView(APIView):
+    """
+    Payment provider callbacks:
+    - The body must carry a valid HMAC signature for the provider's secret
+    - Each provider event id is stored once; retries are acknowledged and dropped
+    - Processing happens on the webhook queue, after the provider gets its 2xx
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = []  # Providers retry in bursts; the signature gates access
+
+    def post(self, request, provider):
+        secret = get_secret(provider)
+        if secret is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        body = request.body
+        if not verify_signature(secret, body, request.headers.get(SIGNATURE_HEADER)):
+            return Response(
+                {'errors': {'signature': ['Invalid signature']}},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        try:
+            payload = json.loads(body)
+            payload['id']
+        except (ValueError, TypeError, KeyError):
+            return Response(
+                {'errors': {'body': ['Expected a JSON event with an id']}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        event = record_event(provider, payload)
+        if event is None:
+            return Response({'status': 'duplicate'})
+        transaction.on_commit(lambda: get_webhook_queue().submit(event.pk))
+        return Response({'status': 'accepted'}, status=status.HTTP_202_ACCEPTED)
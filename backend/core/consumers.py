@@ -0,0 +1,65 @@
+import asyncio
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from campusdorm_project.utils.websocket_auth import JWTWebsocketAuthMixin
+from .notifications import user_group_name
+
+
+class BookingNotificationConsumer(JWTWebsocketAuthMixin, AsyncWebsocketConsumer):
+    """
+    Delivers booking status changes to students and dorm owners.
+    Changes to the same booking inside the coalescing window are merged
+    into one event carrying the first previous status and the latest status.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection with JWT authentication"""
+        self._pending = {}  # booking id -> latest unsent change
+        self._flush_timer = None
+        self._flush_tasks = set()  # Held so a pending flush isn't garbage-collected
+        try:
+            await self._authenticate_user()
+            await self._validate_user()
+            self.group_name = user_group_name(self.user.pk)
+            await self.channel_layer.group_add(self.group_name, self.channel_name)
+            await self.accept()
+        except (InvalidToken, PermissionError):
+            await self.close(code=4001)
+        except Exception:
+            await self.close(code=4000)
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection"""
+        if getattr(self, '_flush_timer', None) is not None:
+            self._flush_timer.cancel()
+        for task in getattr(self, '_flush_tasks', ()):
+            task.cancel()
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def booking_status(self, event):
+        """Queue a status change, merging with an unsent one for the same booking"""
+        booking = event['booking']
+        pending = self._pending.get(booking['id'])
+        if pending is not None:
+            booking = {**booking, 'previous_status': pending['previous_status']}
+        self._pending[booking['id']] = booking
+
+        if self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                settings.BOOKING_NOTIFICATION_WINDOW,
+                self._schedule_flush
+            )
+
+    def _schedule_flush(self):
+        task = asyncio.get_running_loop().create_task(self._flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self):
+        self._flush_timer = None
+        pending, self._pending = self._pending, {}
+        for booking in pending.values():
+            await self.send(text_data=json.dumps({'type': 'booking.status', 'booking': booking}))
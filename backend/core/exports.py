@@ -0,0 +1,126 @@
+import csv
+from datetime import datetime, time, timedelta
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from .models import Booking, Payment
+
+CHUNK_SIZE = 2000
+
+# Columns are (header, values_list path); rows never become model instances
+EXPORTS = {
+    'bookings': {
+        'queryset': Booking.objects.all,
+        'columns': [
+            ('id', 'id'),
+            ('student', 'user__username'),
+            ('dorm_id', 'dorm_id'),
+            ('dorm', 'dorm__name'),
+            ('move_in_date', 'move_in_date'),
+            ('move_out_date', 'move_out_date'),
+            ('status', 'status'),
+            ('created_at', 'created_at'),
+        ],
+        'dorm_field': 'dorm_id',
+        'statuses': {status: {'status': status} for status in Booking.Status.values},
+    },
+    'payments': {
+        'queryset': Payment.objects.all,
+        'columns': [
+            ('id', 'id'),
+            ('booking_id', 'booking_id'),
+            ('dorm_id', 'booking__dorm_id'),
+            ('dorm', 'booking__dorm__name'),
+            ('amount', 'amount'),
+            ('method', 'method'),
+            ('reference_number', 'reference_number'),
+            ('is_verified', 'is_verified'),
+            ('created_at', 'created_at'),
+        ],
+        'dorm_field': 'booking__dorm_id',
+        'statuses': {'verified': {'is_verified': True}, 'unverified': {'is_verified': False}},
+    },
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(kind, start=None, end=None, dorm=None, status=None, chunk_size=CHUNK_SIZE):
+    """
+    Return (header, rows) for an export. ``start``/``end`` are inclusive
+    dates on created_at; rows are tuples streamed by a chunked iterator.
+    """
+    spec = EXPORTS.get(kind)
+    if spec is None:
+        raise ValueError(f"Unknown export '{kind}', choose one of {', '.join(EXPORTS)}")
+
+    queryset = spec['queryset']()
+    if start is not None:
+        queryset = queryset.filter(created_at__gte=_day_start(start))
+    if end is not None:
+        queryset = queryset.filter(created_at__lt=_day_start(end + timedelta(days=1)))
+    if dorm is not None:
+        queryset = queryset.filter(**{spec['dorm_field']: dorm})
+    if status is not None:
+        if status not in spec['statuses']:
+            raise ValueError(f"Unknown {kind} status '{status}', choose one of {', '.join(spec['statuses'])}")
+        queryset = queryset.filter(**spec['statuses'][status])
+
+    header = [name for name, _ in spec['columns']]
+    rows = (
+        queryset.order_by('id')
+        .values_list(*(path for _, path in spec['columns']))
+        .iterator(chunk_size=chunk_size)
+    )
+    return header, rows
+
+
+class _Echo:
+    """File-like object handing csv.writer output straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _batched(rows, size):
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def csv_chunks(header, rows, batch_size=500):
+    """Encode rows as CSV, yielding one string per batch of rows"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for batch in _batched(rows, batch_size):
+        yield ''.join(writer.writerow(row) for row in batch)
+
+
+def jsonl_chunks(header, rows, batch_size=500):
+    """Encode rows as JSON Lines, yielding one string per batch of rows"""
+    encode = DjangoJSONEncoder().encode
+    for batch in _batched(rows, batch_size):
+        yield ''.join(encode(dict(zip(header, row))) + '\n' for row in batch)
+
+
+async def async_chunks(chunks):
+    """
+    Async view of a chunk generator for ASGI responses, which would otherwise
+    buffer a sync iterator whole. Chunks are produced in the request's sync
+    thread, where the export's database cursor lives.
+    """
+    done = object()
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+FORMATS = {
+    'csv': (csv_chunks, 'text/csv'),
+    'jsonl': (jsonl_chunks, 'application/x-ndjson'),
+}
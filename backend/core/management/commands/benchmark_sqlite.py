@@ -0,0 +1,139 @@
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+SCHEMA = """
+CREATE TABLE dorm (id INTEGER PRIMARY KEY, name TEXT, confirmed INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE booking (
+    id INTEGER PRIMARY KEY, dorm_id INTEGER NOT NULL, user_id INTEGER NOT NULL,
+    status TEXT NOT NULL, created_at TEXT NOT NULL
+);
+CREATE INDEX booking_dorm_status ON booking (dorm_id, status);
+"""
+
+
+class Command(BaseCommand):
+    help = "Concurrent read/write benchmark of SQLite with Django defaults vs SQLITE_OPTIONS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds per profile")
+        parser.add_argument('--dorms', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=20000, help="Rows seeded before the run")
+
+    def handle(self, *args, **options):
+        profiles = [('django defaults', {}), ('SQLITE_OPTIONS', settings.SQLITE_OPTIONS)]
+        for name, sqlite_options in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                stats = self._run(path, sqlite_options, options)
+            self._report(name, stats, options)
+
+    def _connect(self, path, sqlite_options):
+        """Open a raw connection exactly as Django's SQLite backend would"""
+        settings_dict = connections.configure_settings({
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, 'OPTIONS': dict(sqlite_options)}
+        })['default']
+        wrapper = DatabaseWrapper(settings_dict, alias='bench')
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        begin = f"BEGIN {wrapper.transaction_mode}" if wrapper.transaction_mode else "BEGIN"
+        return connection, begin
+
+    def _seed(self, path, sqlite_options, options):
+        connection, _ = self._connect(path, sqlite_options)
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO dorm (id, name) VALUES (?, ?)",
+            ((i, f'Dorm {i}') for i in range(1, options['dorms'] + 1))
+        )
+        connection.executemany(
+            "INSERT INTO booking (dorm_id, user_id, status, created_at) VALUES (?, ?, 'pending', datetime('now'))",
+            ((random.randint(1, options['dorms']), i) for i in range(options['bookings']))
+        )
+        connection.commit()
+        connection.close()
+
+    def _run(self, path, sqlite_options, options):
+        self._seed(path, sqlite_options, options)
+        dorms = options['dorms']
+        deadline = time.perf_counter() + options['duration']
+        lock = threading.Lock()
+        stats = {'reads': 0, 'writes': 0, 'locked': 0, 'write_latencies': []}
+
+        def reader():
+            connection, _ = self._connect(path, sqlite_options)
+            reads = 0
+            while time.perf_counter() < deadline:
+                try:
+                    connection.execute(
+                        "SELECT id, user_id, status FROM booking WHERE dorm_id = ? ORDER BY id DESC LIMIT 20",
+                        (random.randint(1, dorms),)
+                    ).fetchall()
+                    reads += 1
+                except connection.OperationalError:
+                    with lock:
+                        stats['locked'] += 1
+            connection.close()
+            with lock:
+                stats['reads'] += reads
+
+        def writer(user_id):
+            # Mirrors Booking.save: availability check, insert, counter bump in one transaction
+            connection, begin = self._connect(path, sqlite_options)
+            writes, latencies = 0, []
+            while time.perf_counter() < deadline:
+                dorm_id = random.randint(1, dorms)
+                started = time.perf_counter()
+                try:
+                    connection.execute(begin)
+                    connection.execute(
+                        "SELECT count(*) FROM booking WHERE dorm_id = ? AND status = 'confirmed'", (dorm_id,)
+                    ).fetchone()
+                    connection.execute(
+                        "INSERT INTO booking (dorm_id, user_id, status, created_at) "
+                        "VALUES (?, ?, 'confirmed', datetime('now'))",
+                        (dorm_id, user_id)
+                    )
+                    connection.execute("UPDATE dorm SET confirmed = confirmed + 1 WHERE id = ?", (dorm_id,))
+                    connection.execute("COMMIT")
+                    writes += 1
+                    latencies.append(time.perf_counter() - started)
+                except connection.OperationalError:
+                    if connection.in_transaction:
+                        connection.execute("ROLLBACK")
+                    with lock:
+                        stats['locked'] += 1
+            connection.close()
+            with lock:
+                stats['writes'] += writes
+                stats['write_latencies'].extend(latencies)
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats['elapsed'] = time.perf_counter() - started
+        return stats
+
+    def _report(self, name, stats, options):
+        elapsed = stats['elapsed']
+        latencies = sorted(stats['write_latencies'])
+        if len(latencies) >= 2:
+            p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+        else:
+            p99 = float('nan')
+        self.stdout.write(f"{name} ({options['readers']} readers, {options['writers']} writers)")
+        self.stdout.write(f"  Reads:              {stats['reads'] / elapsed:.0f}/s")
+        self.stdout.write(f"  Writes:             {stats['writes'] / elapsed:.0f}/s (p99 {p99:.1f} ms)")
+        self.stdout.write(f"  'database is locked': {stats['locked']}")
@@ -0,0 +1,39 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from core.exports import CHUNK_SIZE, EXPORTS, FORMATS, export_rows
+
+
+class Command(BaseCommand):
+    help = "Stream bookings or payments to CSV / JSON Lines with flat memory use"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument('--format', dest='file_format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--start', type=date.fromisoformat, help="First created_at date (YYYY-MM-DD)")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last created_at date, inclusive")
+        parser.add_argument('--dorm', type=int, help="Only rows for this dorm id")
+        parser.add_argument('--status', help="Booking status, or verified/unverified for payments")
+        parser.add_argument('--output', help="File to write (default: stdout)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows fetched per database round trip")
+
+    def handle(self, *args, **options):
+        try:
+            header, rows = export_rows(
+                options['kind'],
+                start=options['start'],
+                end=options['end'],
+                dorm=options['dorm'],
+                status=options['status'],
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        encode, _ = FORMATS[options['file_format']]
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else self.stdout
+        try:
+            for chunk in encode(header, rows):
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
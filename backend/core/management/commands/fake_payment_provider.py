@@ -0,0 +1,164 @@
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from core.models import Booking, Dorm, Payment, PaymentWebhookEvent, User
+from core.webhooks import SIGNATURE_HEADER, get_secret, get_webhook_queue, sign
+
+USERNAME_PREFIX = 'webhooktest_'
+
+
+class Command(BaseCommand):
+    help = "Stand-in payment provider: replays signed callbacks, with retries, for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', default='gcash', choices=['gcash', 'bank_transfer'])
+        parser.add_argument('--events', type=int, default=1000, help="Distinct payment events")
+        parser.add_argument('--retries', type=int, default=3, help="Deliveries per event (retry storm)")
+        parser.add_argument('--concurrency', type=int, default=16, help="Parallel deliveries")
+        parser.add_argument('--url', help="POST to a running server instead of in-process")
+        parser.add_argument('--keep', action='store_true', help="Keep fixture payments and events")
+
+    def handle(self, *args, **options):
+        provider = options['provider']
+        secret = get_secret(provider)
+        if secret is None:
+            raise CommandError(f"Set a webhook secret for {provider} in PAYMENT_WEBHOOKS")
+
+        payments = self._create_fixtures(provider, options['events'])
+        deliveries = []
+        for payment in payments:
+            body = json.dumps({
+                'id': f'evt_{uuid.uuid4().hex}',
+                'type': 'payment.succeeded',
+                'data': {
+                    'reference_number': payment.reference_number,
+                    'amount': str(payment.amount),
+                    'booking_id': payment.booking_id,
+                },
+            }).encode()
+            deliveries.extend([body] * options['retries'])
+        random.shuffle(deliveries)
+
+        url = options['url'] or reverse('payment-webhook', kwargs={'provider': provider})
+        send = self._http_sender(url) if options['url'] else self._client_sender(url)
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                results = list(pool.map(lambda body: send(body, sign(secret, body)), deliveries))
+            elapsed = time.perf_counter() - started
+            if not options['url']:
+                get_webhook_queue().join()
+            self._report(payments, results, elapsed, options)
+        finally:
+            if not options['keep']:
+                PaymentWebhookEvent.objects.filter(
+                    provider=provider,
+                    payload__data__reference_number__startswith=USERNAME_PREFIX
+                ).delete()
+                User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def _create_fixtures(self, provider, count):
+        """Unverified payments awaiting provider confirmation, one booking each"""
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        owner = User.objects.create(
+            username=f'{USERNAME_PREFIX}owner',
+            role=User.Role.DORM_OWNER,
+            phone='+639190000000',
+            is_verified=True
+        )
+        dorm = Dorm.objects.create(
+            owner=owner,
+            name='Webhook test dorm',
+            address='N/A',
+            monthly_rate=1500,
+            is_approved=True
+        )
+        students = User.objects.bulk_create(
+            User(
+                username=f'{USERNAME_PREFIX}student_{i}',
+                role=User.Role.STUDENT,
+                phone=f'+63919{i + 1:07d}',
+                school_id_number=f'NEUST-2025-{i:05d}'
+            )
+            for i in range(count)
+        )
+        move_in = timezone.localdate() + timedelta(days=30)
+        bookings = Booking.objects.bulk_create(
+            Booking(user=student, dorm=dorm, move_in_date=move_in, move_out_date=move_in + timedelta(days=150))
+            for student in students
+        )
+        return Payment.objects.bulk_create(
+            Payment(
+                booking=booking,
+                amount=1500,
+                method=provider,
+                reference_number=f'{USERNAME_PREFIX}{uuid.uuid4().hex[:16]}'
+            )
+            for booking in bookings
+        )
+
+    @staticmethod
+    def _client_sender(path):
+        def send(body, signature):
+            started = time.perf_counter()
+            response = Client(SERVER_NAME='localhost').post(
+                path,
+                body,
+                content_type='application/json',
+                headers={SIGNATURE_HEADER: signature}
+            )
+            close_old_connections()
+            return response.status_code, time.perf_counter() - started
+        return send
+
+    @staticmethod
+    def _http_sender(url):
+        def send(body, signature):
+            request = urllib.request.Request(
+                url,
+                data=body,
+                headers={'Content-Type': 'application/json', SIGNATURE_HEADER: signature}
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    code = response.status
+            except urllib.error.HTTPError as exc:
+                code = exc.code
+            return code, time.perf_counter() - started
+        return send
+
+    def _report(self, payments, results, elapsed, options):
+        codes = Counter(code for code, _ in results)
+        latencies = sorted(latency for _, latency in results)
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            p50, p99 = cuts[49] * 1000, cuts[98] * 1000
+        else:
+            p50 = p99 = float('nan')
+        references = [payment.reference_number for payment in payments]
+        events = Counter(
+            PaymentWebhookEvent.objects.filter(
+                provider=options['provider'],
+                payload__data__reference_number__startswith=USERNAME_PREFIX
+            ).values_list('status', flat=True)
+        )
+        verified = Payment.objects.filter(reference_number__in=references, is_verified=True).count()
+
+        self.stdout.write(f"Deliveries:          {len(results)} ({len(results) / elapsed:.1f}/s)")
+        self.stdout.write(f"Responses:           {dict(sorted(codes.items()))}")
+        self.stdout.write(f"Latency p50/p99:     {p50:.2f} / {p99:.2f} ms")
+        self.stdout.write(f"Events stored:       {sum(events.values())} ({dict(events)})")
+        self.stdout.write(f"Payments verified:   {verified} of {len(payments)}")
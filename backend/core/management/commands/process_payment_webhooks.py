@@ -0,0 +1,24 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import PaymentWebhookEvent
+from core.webhooks import process_event
+
+
+class Command(BaseCommand):
+    help = "Process payment webhook events left unprocessed (worker restarts, transient failures)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=60, help="Skip events younger than this many seconds")
+        parser.add_argument('--limit', type=int, default=1000, help="Events handled per run")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        event_ids = list(
+            PaymentWebhookEvent.objects.filter(
+                status=PaymentWebhookEvent.Status.RECEIVED,
+                received_at__lte=cutoff
+            ).order_by('received_at').values_list('id', flat=True)[:options['limit']]
+        )
+        processed = sum(process_event(event_id) for event_id in event_ids)
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} of {len(event_ids)} pending events"))
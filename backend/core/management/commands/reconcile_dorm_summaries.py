@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from core.models import Dorm
+from core.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild owner dashboard summaries from bookings, payments and reviews (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Dorms rebuilt per batch")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        rebuilt = 0
+        last_id = 0
+        while True:
+            dorm_ids = list(
+                Dorm.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            if not dorm_ids:
+                break
+            rebuilt += rebuild_summaries(dorm_ids)
+            last_id = dorm_ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {rebuilt} dorm summaries"))
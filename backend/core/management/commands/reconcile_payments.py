@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Payment
+from core.reconciliation import CHUNK_SIZE, reconcile_statement
+
+
+class Command(BaseCommand):
+    help = "Verify payments against a provider statement (CSV) by reference number"
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help="Path to the statement CSV")
+        parser.add_argument(
+            '--method',
+            required=True,
+            choices=[method for method, _ in Payment.METHOD_CHOICES if method != 'cash']
+        )
+        parser.add_argument('--reference-column', default='reference_number')
+        parser.add_argument('--amount-column', default='amount')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Statement rows matched per query")
+        parser.add_argument('--dry-run', action='store_true', help="Report without verifying anything")
+
+    def handle(self, *args, **options):
+        try:
+            # utf-8-sig drops the BOM spreadsheet exports tend to add
+            with open(options['statement'], newline='', encoding='utf-8-sig') as lines:
+                report = reconcile_statement(
+                    lines,
+                    options['method'],
+                    reference_column=options['reference_column'],
+                    amount_column=options['amount_column'],
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for entry in report['unmatched']:
+            self.stdout.write(f"line {entry['line']}: no {options['method']} payment for {entry['reference_number']}")
+        for entry in report['amount_mismatches']:
+            self.stdout.write(
+                f"line {entry['line']}: payment #{entry['payment_id']} is ₱{entry['expected']}, "
+                f"statement says ₱{entry['amount']}"
+            )
+        for entry in report['duplicates']:
+            self.stdout.write(f"line {entry['line']}: {entry['reference_number']} {entry['reason']}")
+        for entry in report['invalid']:
+            self.stdout.write(f"line {entry['line']}: missing reference number or amount")
+
+        verb = "Would verify" if options['dry_run'] else "Verified"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['verified']} of {report['rows']} statement rows "
+            f"({report['already_verified']} already verified, {len(report['unmatched'])} unmatched, "
+            f"{len(report['amount_mismatches'])} amount mismatches, {len(report['duplicates'])} duplicates)"
+        ))
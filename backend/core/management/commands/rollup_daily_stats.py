@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.rollups import rollup_range
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute daily analytics rollups. Without arguments refreshes yesterday "
+        "and today (schedule nightly); pass --start to backfill history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last date, inclusive (default: today)")
+        parser.add_argument('--chunk-days', type=int, default=7, help="Days recomputed per transaction")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start = options['start'] or today - timedelta(days=1)
+        end = (options['end'] or today) + timedelta(days=1)
+        if start >= end:
+            raise CommandError("--start must not be after --end")
+
+        rows = 0
+        chunk = timedelta(days=options['chunk_days'])
+        while start < end:
+            chunk_end = min(start + chunk, end)
+            rows += rollup_range(start, chunk_end)
+            self.stdout.write(f"Rolled up {start} .. {chunk_end - timedelta(days=1)}")
+            start = chunk_end
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} rollup rows"))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_dorm_is_approved'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DormSummary',
+            fields=[
+                ('dorm', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='core.dorm')),
+                ('pending_bookings', models.IntegerField(default=0)),
+                ('confirmed_bookings', models.IntegerField(default=0, help_text='Current occupancy')),
+                ('completed_bookings', models.IntegerField(default=0)),
+                ('confirmed_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Sum of verified payments in PHP', max_digits=14)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_total', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(help_text='Copied from the dorm so the dashboard reads one indexed range', on_delete=django.db.models.deletion.CASCADE, related_name='dorm_summaries', to='core.user')),
+            ],
+            options={
+                'verbose_name': 'Dorm Summary',
+                'verbose_name_plural': 'Dorm Summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dorm_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDormStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bookings_created', models.IntegerField(default=0)),
+                ('occupied_bookings', models.IntegerField(default=0, help_text='Confirmed/completed bookings whose stay covers this date')),
+                ('payments_verified', models.IntegerField(default=0)),
+                ('revenue_cash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenue_gcash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenue_bank_transfer', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('dorm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.dorm')),
+            ],
+            options={
+                'verbose_name': 'Daily Dorm Stats',
+                'verbose_name_plural': 'Daily Dorm Stats',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['dorm', 'date'], name='daily_stats_dorm_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'dorm'), name='unique_daily_dorm_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_daily_dorm_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='core_bookin_move_in_321b6b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['move_in_date', 'id'], name='booking_move_in_id_idx'),
+        ),
+    ]
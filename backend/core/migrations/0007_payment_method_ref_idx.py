@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_booking_move_in_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['method', 'reference_number'], name='payment_method_ref_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+from decimal import Decimal
+from django.db import migrations
+from django.db.models import Count, Sum
+
+CHUNK_SIZE = 500
+
+# Frozen copy of core.summaries as of this migration, so later changes there don't alter it
+STATUS_FIELDS = {
+    'pending': 'pending_bookings',
+    'confirmed': 'confirmed_bookings',
+    'completed': 'completed_bookings',
+}
+
+SUMMARY_FIELDS = [
+    'owner', 'pending_bookings', 'confirmed_bookings', 'completed_bookings',
+    'confirmed_revenue', 'review_count', 'rating_total', 'updated_at',
+]
+
+
+def build_summaries(apps, dorm_ids):
+    Booking = apps.get_model('core', 'Booking')
+    Dorm = apps.get_model('core', 'Dorm')
+    DormSummary = apps.get_model('core', 'DormSummary')
+    Payment = apps.get_model('core', 'Payment')
+    Review = apps.get_model('core', 'Review')
+
+    owners = dict(Dorm.objects.filter(id__in=dorm_ids).values_list('id', 'owner_id'))
+    rows = {dorm_id: DormSummary(dorm_id=dorm_id, owner_id=owner_id) for dorm_id, owner_id in owners.items()}
+
+    for dorm_id, status, count in (
+        Booking.objects.filter(dorm_id__in=owners)
+        .values_list('dorm_id', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    ):
+        if status in STATUS_FIELDS:
+            setattr(rows[dorm_id], STATUS_FIELDS[status], count)
+
+    for dorm_id, total in (
+        Payment.objects.filter(booking__dorm_id__in=owners, is_verified=True)
+        .values_list('booking__dorm_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    ):
+        rows[dorm_id].confirmed_revenue = total or Decimal('0')
+
+    for dorm_id, count, total in (
+        Review.objects.filter(dorm_id__in=owners)
+        .values_list('dorm_id')
+        .annotate(count=Count('id'), total=Sum('rating'))
+        .order_by()
+    ):
+        rows[dorm_id].review_count = count
+        rows[dorm_id].rating_total = total or 0
+
+    DormSummary.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=['dorm'],
+        update_fields=SUMMARY_FIELDS,
+    )
+
+
+def backfill_summaries(apps, schema_editor):
+    """Summaries for dorms that predate them, so owner dashboards aren't empty after deploy"""
+    Dorm = apps.get_model('core', 'Dorm')
+    last_id = 0
+    while dorm_ids := list(
+        Dorm.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:CHUNK_SIZE]
+    ):
+        build_summaries(apps, dorm_ids)
+        last_id = dorm_ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_booking_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
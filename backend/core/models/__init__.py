@@ -3,4 +3,7 @@ from .dorm import Dorm
 from .amenity import Amenity
 from .booking import Booking
 from .payment import Payment
-from .review import Review
\ No newline at end of file
+from .review import Review
+from .dorm_summary import DormSummary
+from .daily_stats import DailyDormStats
+from .webhook_event import PaymentWebhookEvent
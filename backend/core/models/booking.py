@@ -43,6 +43,7 @@ class Booking(models.Model):
         db_index=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = _("Booking")
@@ -50,7 +51,8 @@ class Booking(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'created_at']),
-            models.Index(fields=['move_in_date']),
+            # Admin date_hierarchy drilldown: range on move_in_date, ordered by it
+            models.Index(fields=['move_in_date', 'id'], name='booking_move_in_id_idx'),
             models.Index(fields=['user', 'status'], name='booking_user_status_idx'),
         ]
         constraints = [
@@ -98,8 +100,8 @@ class Booking(models.Model):
                 'move_in_date': _("Move-in date cannot be in the past")
             })
             
-        # Validate dorm availability
-        if not self.dorm.is_available_for(self.move_in_date, self.move_out_date):
+        # Validate dorm availability (a booking never overlaps itself)
+        if not self.dorm.is_available_for(self.move_in_date, self.move_out_date, exclude=self.pk):
             raise ValidationError({
                 'dorm': _("This dorm is not available for the selected dates")
             })
@@ -108,20 +110,29 @@ class Booking(models.Model):
         """Atomic save with concurrency controls and dorm locking"""
         from django.db import transaction
         
+        from core.notifications import publish_booking_status
+        
         with transaction.atomic():
+            # Lock the dorm row so concurrent bookings can't both pass the availability check
+            Dorm.objects.select_for_update().only('pk').get(pk=self.dorm_id)
             self.full_clean()
+            # Read the stored status before it is overwritten
+            original_status = None
+            if self.pk:
+                original_status = Booking.objects.filter(pk=self.pk).values_list('status', flat=True).first()
             super().save(*args, **kwargs)
             
-            # Lock dorm row during availability update
-            dorm = Dorm.objects.select_for_update().get(pk=self.dorm_id)
-            dorm.update_availability_cache()
-            
-            if self.pk:
-                original = Booking.objects.get(pk=self.pk)
-                if original.status != self.status:
+            if original_status != self.status:
+                if original_status is not None:
                     logger.info(
                         "Booking %d status changed: %s → %s",
                         self.id,
-                        original.status,
+                        original_status,
                         self.status
                     )
+                # Announce only once the change is durable
+                def notify():
+                    publish_booking_status(self, original_status)
+                    self._status_change_notification_sent = True
+                
+                transaction.on_commit(notify)
@@ -0,0 +1,35 @@
+from django.db import models
+from .dorm import Dorm
+
+
+class DailyDormStats(models.Model):
+    """
+    Daily per-dorm rollup behind admin analytics.
+    Event counts are bumped by core.signals; occupancy is a snapshot
+    written by the rollup_daily_stats command.
+    """
+    date = models.DateField()
+    dorm = models.ForeignKey(Dorm, on_delete=models.CASCADE, related_name='daily_stats')
+    bookings_created = models.IntegerField(default=0)
+    occupied_bookings = models.IntegerField(
+        default=0,
+        help_text="Confirmed/completed bookings whose stay covers this date"
+    )
+    payments_verified = models.IntegerField(default=0)
+    revenue_cash = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenue_gcash = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenue_bank_transfer = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Daily Dorm Stats"
+        verbose_name_plural = "Daily Dorm Stats"
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'dorm'], name='unique_daily_dorm_stats')
+        ]
+        indexes = [
+            models.Index(fields=['dorm', 'date'], name='daily_stats_dorm_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - dorm #{self.dorm_id}"
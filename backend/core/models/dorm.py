@@ -45,4 +45,15 @@ class Dorm(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.name} (₱{self.monthly_rate}/month)"
\ No newline at end of file
+        return f"{self.name} (₱{self.monthly_rate}/month)"
+
+    def is_available_for(self, move_in_date, move_out_date, exclude=None):
+        """True unless a pending or confirmed booking overlaps the dates (``exclude``: a booking pk to ignore)"""
+        overlapping = self.bookings.filter(
+            status__in=['pending', 'confirmed'],
+            move_out_date__gt=move_in_date,
+            move_in_date__lt=move_out_date
+        )
+        if exclude is not None:
+            overlapping = overlapping.exclude(pk=exclude)
+        return not overlapping.exists()
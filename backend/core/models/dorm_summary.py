@@ -0,0 +1,48 @@
+from django.db import models
+from .user import User
+from .dorm import Dorm
+
+
+class DormSummary(models.Model):
+    """
+    Per-dorm dashboard figures, kept current by core.signals and
+    periodically rebuilt by the reconcile_dorm_summaries command
+    """
+    dorm = models.OneToOneField(
+        Dorm,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary'
+    )
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='dorm_summaries',
+        help_text="Copied from the dorm so the dashboard reads one indexed range"
+    )
+    # Plain integers: a drifted counter must not make a booking write fail
+    pending_bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0, help_text="Current occupancy")
+    completed_bookings = models.IntegerField(default=0)
+    confirmed_revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of verified payments in PHP"
+    )
+    review_count = models.IntegerField(default=0)
+    rating_total = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Dorm Summary"
+        verbose_name_plural = "Dorm Summaries"
+
+    def __str__(self):
+        return f"Summary for {self.dorm_id}"
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_total / self.review_count, 2)
@@ -39,6 +39,10 @@ class Payment(models.Model):
     class Meta:
         verbose_name = "Payment Record"
         ordering = ['-created_at']
+        indexes = [
+            # Statement reconciliation joins on the provider's reference
+            models.Index(fields=['method', 'reference_number'], name='payment_method_ref_idx'),
+        ]
 
     def __str__(self):
         return f"Payment #{self.id} - ₱{self.amount}"
\ No newline at end of file
@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class PaymentWebhookEvent(models.Model):
+    """
+    Inbox row per provider callback. The unique (provider, event_id) pair makes
+    provider retries no-ops; core.webhooks processes each row exactly once.
+    """
+    class Status(models.TextChoices):
+        RECEIVED = 'received', 'Received'
+        PROCESSED = 'processed', 'Processed'
+        FAILED = 'failed', 'Failed'
+
+    provider = models.CharField(max_length=20)
+    event_id = models.CharField(max_length=100)
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.RECEIVED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='unique_provider_event')
+        ]
+        indexes = [
+            # Sweeper only scans events still waiting to be processed
+            models.Index(
+                fields=['received_at'],
+                condition=models.Q(status='received'),
+                name='webhook_event_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} {self.event_id}"
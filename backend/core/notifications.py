@@ -0,0 +1,38 @@
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def user_group_name(user_id):
+    """Per-user channel layer group for account notifications"""
+    return f"user_{user_id}"
+
+
+def publish_booking_status(booking, previous_status):
+    """
+    Push a booking transition to the student and the dorm owner.
+    Call from transaction.on_commit so rolled-back changes are never announced.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    event = {
+        'type': 'booking.status',
+        'booking': {
+            'id': booking.pk,
+            'dorm': booking.dorm_id,
+            'previous_status': previous_status,
+            'status': booking.status,
+            'changed_at': timezone.now().isoformat(),
+        }
+    }
+    try:
+        for user_id in {booking.user_id, booking.dorm.owner_id}:
+            async_to_sync(channel_layer.group_send)(user_group_name(user_id), event)
+    except Exception:
+        # Notifications are best effort; the booking itself is committed
+        logger.exception("Failed to publish status change for booking %d", booking.pk)
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 from django.utils.translation import gettext_lazy as _
 
@@ -13,7 +15,7 @@ class IsDormOwner(permissions.BasePermission):
     message = _("You must be the owner of this dorm to perform this action")
     
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user
+        return obj.owner_id == request.user.pk
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     message = _("This action requires administrator privileges")
@@ -31,4 +33,20 @@ class IsStudent(permissions.BasePermission):
     message = _("Only students are allowed to perform this action.")
 
     def has_permission(self, request, view):
-        return request.user.is_authenticated and getattr(request.user, 'role', None) == 'student'
\ No newline at end of file
+        return request.user.is_authenticated and getattr(request.user, 'role', None) == 'student'
+
+
+class IsDormOwnerUser(permissions.BasePermission):
+    message = _("Only dorm owners are allowed to perform this action.")
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and getattr(request.user, 'role', None) == 'dorm_owner'
+
+
+class HasMetricsToken(permissions.BasePermission):
+    message = _("A valid metrics token is required.")
+
+    def has_permission(self, request, view):
+        token = settings.INSTRUMENTATION.get('TOKEN')
+        header = request.headers.get('Authorization', '')
+        return bool(token) and constant_time_compare(header, f'Bearer {token}')
@@ -0,0 +1,132 @@
+import csv
+from collections import Counter, defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Payment
+from .rollups import bump_daily, revenue_field
+from .summaries import apply_delta
+
+CHUNK_SIZE = 1000
+
+
+def _parse_amount(value):
+    return Decimal(str(value).replace(',', '').replace('₱', '').strip())
+
+
+def _reference(row, reference_column):
+    return (row.get(reference_column) or '').strip()
+
+
+def _rewind(lines):
+    if hasattr(lines, 'seek'):
+        lines.seek(0)
+    return lines
+
+
+def reconcile_statement(lines, method, reference_column='reference_number',
+                        amount_column='amount', chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Match a provider statement (CSV text lines) against payments of ``method``.
+    ``lines`` is read twice, so pass a seekable file or a list.
+    - A first pass counts references; every line of a repeated reference is a duplicate
+    - Rows are read in chunks; each chunk is hash-joined to the payments sharing
+      its reference numbers, fetched in one query on (method, reference_number)
+    - Exact matches are verified with one bulk_update per chunk
+    - Unknown references, amount mismatches and duplicates are reported, never verified
+    """
+    reader = csv.DictReader(lines)
+    missing = {reference_column, amount_column} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Statement is missing column(s): {', '.join(sorted(missing))}")
+    occurrences = Counter(_reference(row, reference_column) for row in reader)
+    reader = csv.DictReader(_rewind(lines))
+
+    report = {
+        'rows': 0,
+        'verified': 0,
+        'already_verified': 0,
+        'unmatched': [],
+        'amount_mismatches': [],
+        'duplicates': [],
+        'invalid': [],
+    }
+    rows = enumerate(reader, start=2)  # Line 1 is the header
+    while chunk := list(islice(rows, chunk_size)):
+        report['rows'] += len(chunk)
+        statement = {}
+        for line, row in chunk:
+            reference = _reference(row, reference_column)
+            try:
+                amount = _parse_amount(row.get(amount_column))
+            except InvalidOperation:
+                amount = None
+            entry = {'line': line, 'reference_number': reference, 'amount': amount}
+            if not reference or amount is None:
+                report['invalid'].append(entry)
+            elif occurrences[reference] > 1:
+                report['duplicates'].append({**entry, 'reason': 'repeated in statement'})
+            else:
+                statement[reference] = entry
+        if statement:
+            _match_chunk(statement, method, report, dry_run)
+    return report
+
+
+def _match_chunk(statement, method, report, dry_run):
+    with transaction.atomic():
+        payments = defaultdict(list)
+        for payment in (
+            Payment.objects.select_for_update(of=('self',))
+            .filter(method=method, reference_number__in=statement)
+            .annotate(dorm_id=F('booking__dorm_id'))
+            .only('id', 'amount', 'method', 'reference_number', 'is_verified', 'created_at')
+        ):
+            payments[payment.reference_number].append(payment)
+
+        to_verify = []
+        for reference, entry in statement.items():
+            matches = payments.get(reference)
+            if not matches:
+                report['unmatched'].append(entry)
+            elif len(matches) > 1:
+                report['duplicates'].append({
+                    **entry,
+                    'reason': 'shared by several payments',
+                    'payment_ids': [payment.id for payment in matches],
+                })
+            elif matches[0].amount != entry['amount']:
+                report['amount_mismatches'].append({
+                    **entry,
+                    'payment_id': matches[0].id,
+                    'expected': matches[0].amount,
+                })
+            elif matches[0].is_verified:
+                report['already_verified'] += 1
+            else:
+                to_verify.append(matches[0])
+
+        report['verified'] += len(to_verify)
+        if dry_run or not to_verify:
+            return
+        for payment in to_verify:
+            payment.is_verified = True
+        Payment.objects.bulk_update(to_verify, ['is_verified'])
+        _count_verified(to_verify)
+
+
+def _count_verified(payments):
+    """bulk_update skips signals, so apply their summary and rollup deltas here"""
+    revenue = Counter()
+    daily = defaultdict(Counter)
+    for payment in payments:
+        revenue[payment.dorm_id] += payment.amount
+        day = daily[timezone.localdate(payment.created_at), payment.dorm_id]
+        day['payments_verified'] += 1
+        day[revenue_field(payment.method)] += payment.amount
+    for dorm_id, amount in revenue.items():
+        apply_delta(dorm_id, confirmed_revenue=amount)
+    for (day, dorm_id), deltas in daily.items():
+        bump_daily(day, dorm_id, **deltas)
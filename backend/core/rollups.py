@@ -0,0 +1,81 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from .models import Booking, DailyDormStats, Payment
+
+OCCUPYING_STATUSES = [Booking.Status.CONFIRMED, Booking.Status.COMPLETED]
+
+
+def revenue_field(method):
+    """DailyDormStats column for a Payment.method value"""
+    return f'revenue_{method}'
+
+
+def bump_daily(day, dorm_id, create_missing=True, **deltas):
+    """Add signed deltas to one (date, dorm) rollup row, creating it if needed"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or dorm_id is None:
+        return
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    rows = DailyDormStats.objects.filter(date=day, dorm_id=dorm_id)
+    if rows.update(**increments) or not create_missing:
+        return
+    try:
+        with transaction.atomic():
+            DailyDormStats.objects.create(date=day, dorm_id=dorm_id, **deltas)
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(**increments)
+
+
+def rollup_range(start, end):
+    """
+    Recompute rollup rows for start <= date < end from the raw tables.
+    Rows in the range are replaced, so this doubles as backfill and repair.
+    """
+    rows = defaultdict(dict)
+
+    for day, dorm_id, count in (
+        Booking.objects.filter(created_at__date__gte=start, created_at__date__lt=end)
+        .annotate(day=TruncDate('created_at'))
+        .values_list('day', 'dorm_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    ):
+        rows[day, dorm_id]['bookings_created'] = count
+
+    for day, dorm_id, method, count, total in (
+        Payment.objects.filter(is_verified=True, created_at__date__gte=start, created_at__date__lt=end)
+        .annotate(day=TruncDate('created_at'))
+        .values_list('day', 'booking__dorm_id', 'method')
+        .annotate(count=Count('id'), total=Sum('amount'))
+        .order_by()
+    ):
+        row = rows[day, dorm_id]
+        row['payments_verified'] = row.get('payments_verified', 0) + count
+        row[revenue_field(method)] = total
+
+    day = start
+    while day < end:
+        for dorm_id, count in (
+            Booking.objects.filter(
+                status__in=OCCUPYING_STATUSES,
+                move_in_date__lte=day,
+                move_out_date__gt=day
+            )
+            .values_list('dorm_id')
+            .annotate(count=Count('id'))
+            .order_by()
+        ):
+            rows[day, dorm_id]['occupied_bookings'] = count
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        DailyDormStats.objects.filter(date__gte=start, date__lt=end).delete()
+        DailyDormStats.objects.bulk_create(
+            DailyDormStats(date=day, dorm_id=dorm_id, **values)
+            for (day, dorm_id), values in rows.items()
+        )
+    return len(rows)
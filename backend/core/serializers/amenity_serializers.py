@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from ..models import Amenity
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
 
-class AmenitySerializer(serializers.ModelSerializer):
+class AmenitySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Amenity
         fields = ['id', 'name', 'icon']
\ No newline at end of file
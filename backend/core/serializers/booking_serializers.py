@@ -1,12 +1,16 @@
 from rest_framework import serializers
 from ..models import Booking
 from django.utils import timezone
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
+from campusdorm_project.utils.sparse_fields import SparseFieldsSerializerMixin
+from .dorm_serializers import DormSerializer
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = ['id', 'user', 'dorm', 'move_in_date', 'move_out_date', 'status']
         read_only_fields = ['user', 'status']
+        expandable_fields = {'dorm': DormSerializer}  # ?expand=dorm
 
     def validate(self, data):
         # PH academic calendar alignment
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from ..models import DormSummary
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
+
+class DormSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    dorm_name = serializers.CharField(source='dorm.name', read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = DormSummary
+        fields = [
+            'dorm', 'dorm_name', 'pending_bookings', 'confirmed_bookings',
+            'completed_bookings', 'confirmed_revenue', 'review_count',
+            'average_rating', 'updated_at'
+        ]
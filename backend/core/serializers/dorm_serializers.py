@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from ..models import Dorm
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
+from campusdorm_project.utils.sparse_fields import SparseFieldsSerializerMixin
 from .amenity_serializers import AmenitySerializer
 
-class DormSerializer(serializers.ModelSerializer):
+class DormSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     amenities = AmenitySerializer(many=True, read_only=True)
     owner = serializers.StringRelatedField(source='owner.username')  # Show owner's username
     
@@ -13,6 +15,10 @@ class DormSerializer(serializers.ModelSerializer):
             'amenities', 'rules', 'owner', 'created_at'
         ]
         read_only_fields = ['owner', 'created_at']
+        related_lookups = {
+            'owner': ('select', 'owner'),
+            'amenities': ('prefetch', 'amenities'),
+        }
 
     def create(self, validated_data):
         # Auto-set owner to current user
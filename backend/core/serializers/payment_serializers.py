@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from ..models import Payment
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = ['id', 'booking', 'amount', 'method', 'reference_number', 'is_verified']
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from ..models import Review
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
 from rest_framework.validators import UniqueTogetherValidator
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ['id', 'user', 'dorm', 'rating', 'comment', 'created_at']
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from ..models import User
+from campusdorm_project.utils.instrumentation import TimedSerializerMixin
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -18,13 +19,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("NEUST ID is required for students.")
         return data
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'role', 'is_verified']
         read_only_fields = ['is_verified']
 
-class AdminUserSerializer(serializers.ModelSerializer):
+class AdminUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
\ No newline at end of file
@@ -0,0 +1,162 @@
+from collections import Counter
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Amenity, Booking, Dorm, DormSummary, Payment, Review, User
+from .rollups import bump_daily, revenue_field
+from .summaries import STATUS_FIELDS, apply_delta
+
+
+def _stored(instance, *fields):
+    """Values currently in the database for a row about to be saved"""
+    if instance.pk is None:
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Dorm)
+def create_dorm_summary(sender, instance, created, **kwargs):
+    if created:
+        DormSummary.objects.create(dorm=instance, owner_id=instance.owner_id)
+    else:
+        DormSummary.objects.filter(dorm=instance).exclude(owner_id=instance.owner_id).update(
+            owner_id=instance.owner_id
+        )
+
+
+@receiver(m2m_changed, sender=Dorm.amenities.through)
+def touch_dorm_amenities(sender, instance, action, reverse, pk_set, **kwargs):
+    """Amenities are part of a dorm's representation, so move its validators"""
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        dorms = Dorm.objects.filter(pk=instance.pk)
+    elif reverse and action in ('post_add', 'post_remove'):
+        dorms = Dorm.objects.filter(pk__in=pk_set)
+    elif reverse and action == 'pre_clear':
+        dorms = Dorm.objects.filter(amenities=instance)
+    else:
+        return
+    dorms.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Amenity)
+def touch_amenity_dorms(sender, instance, created, **kwargs):
+    if not created:
+        Dorm.objects.filter(amenities=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._previous_username = _stored(instance, 'username')
+
+
+@receiver(post_save, sender=User)
+def touch_owner_dorms(sender, instance, **kwargs):
+    """Dorm representations show the owner's username"""
+    previous = getattr(instance, '_previous_username', None)
+    if previous and previous['username'] != instance.username:
+        Dorm.objects.filter(owner=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_status(sender, instance, **kwargs):
+    instance._summary_previous = _stored(instance, 'status', 'dorm_id')
+
+
+@receiver(post_save, sender=Booking)
+def count_booking(sender, instance, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    if previous is None:
+        bump_daily(timezone.localdate(instance.created_at), instance.dorm_id, bookings_created=1)
+    if previous and previous['dorm_id'] != instance.dorm_id:
+        # Moved to another dorm: take it off the old one entirely
+        _booking_delta(previous['dorm_id'], previous['status'], -1)
+        previous = None
+    if previous is None or previous['status'] != instance.status:
+        if previous:
+            _booking_delta(instance.dorm_id, previous['status'], -1)
+        _booking_delta(instance.dorm_id, instance.status, 1)
+
+
+@receiver(post_delete, sender=Booking)
+def uncount_booking(sender, instance, **kwargs):
+    _booking_delta(instance.dorm_id, instance.status, -1)
+    bump_daily(
+        timezone.localdate(instance.created_at),
+        instance.dorm_id,
+        create_missing=False,
+        bookings_created=-1
+    )
+
+
+def _booking_delta(dorm_id, status, delta):
+    field = STATUS_FIELDS.get(status)
+    if field:
+        # Deletes may be cascading from the dorm itself; never recreate its row then
+        apply_delta(dorm_id, rebuild_missing=delta > 0, **{field: delta})
+
+
+def _payment_revenue(amount, is_verified):
+    return amount if is_verified else 0
+
+
+def _payment_rollup(method, amount, is_verified):
+    """DailyDormStats contribution of one payment"""
+    if not is_verified:
+        return Counter()
+    return Counter({'payments_verified': 1, revenue_field(method): amount})
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment(sender, instance, **kwargs):
+    instance._summary_previous = _stored(instance, 'amount', 'is_verified', 'method')
+
+
+@receiver(post_save, sender=Payment)
+def count_payment(sender, instance, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    delta = _payment_revenue(instance.amount, instance.is_verified)
+    rollup = _payment_rollup(instance.method, instance.amount, instance.is_verified)
+    if previous:
+        delta -= _payment_revenue(previous['amount'], previous['is_verified'])
+        rollup.subtract(_payment_rollup(previous['method'], previous['amount'], previous['is_verified']))
+    if delta or any(rollup.values()):
+        dorm_id = _payment_dorm_id(instance)
+        apply_delta(dorm_id, confirmed_revenue=delta)
+        bump_daily(timezone.localdate(instance.created_at), dorm_id, **rollup)
+
+
+@receiver(post_delete, sender=Payment)
+def uncount_payment(sender, instance, **kwargs):
+    revenue = _payment_revenue(instance.amount, instance.is_verified)
+    if revenue:
+        dorm_id = _payment_dorm_id(instance)
+        apply_delta(dorm_id, rebuild_missing=False, confirmed_revenue=-revenue)
+        bump_daily(
+            timezone.localdate(instance.created_at),
+            dorm_id,
+            create_missing=False,
+            **{key: -value for key, value in _payment_rollup(instance.method, instance.amount, True).items()}
+        )
+
+
+def _payment_dorm_id(payment):
+    return Booking.objects.filter(pk=payment.booking_id).values_list('dorm_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Review)
+def remember_review(sender, instance, **kwargs):
+    instance._summary_previous = _stored(instance, 'rating')
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_summary_previous', None)
+    if previous is None:
+        apply_delta(instance.dorm_id, review_count=1, rating_total=instance.rating)
+    else:
+        apply_delta(instance.dorm_id, rating_total=instance.rating - previous['rating'])
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    apply_delta(instance.dorm_id, rebuild_missing=False, review_count=-1, rating_total=-instance.rating)
@@ -0,0 +1,71 @@
+from decimal import Decimal
+from django.db.models import Count, F, Sum
+from .models import Booking, Dorm, DormSummary, Payment, Review
+
+# Booking status -> DormSummary counter; canceled bookings aren't counted
+STATUS_FIELDS = {
+    Booking.Status.PENDING: 'pending_bookings',
+    Booking.Status.CONFIRMED: 'confirmed_bookings',
+    Booking.Status.COMPLETED: 'completed_bookings',
+}
+
+SUMMARY_FIELDS = [
+    'owner', 'pending_bookings', 'confirmed_bookings', 'completed_bookings',
+    'confirmed_revenue', 'review_count', 'rating_total', 'updated_at',
+]
+
+
+def apply_delta(dorm_id, rebuild_missing=True, **deltas):
+    """Add signed deltas to a dorm's summary row in one UPDATE"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = DormSummary.objects.filter(dorm_id=dorm_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated and rebuild_missing:
+        # Row missing (e.g. dorm predates summaries): build it from scratch
+        rebuild_summaries([dorm_id])
+
+
+def rebuild_summaries(dorm_ids):
+    """Recompute summary rows for ``dorm_ids`` with three grouped queries"""
+    owners = dict(Dorm.objects.filter(id__in=dorm_ids).values_list('id', 'owner_id'))
+    rows = {
+        dorm_id: DormSummary(dorm_id=dorm_id, owner_id=owner_id)
+        for dorm_id, owner_id in owners.items()
+    }
+
+    for dorm_id, status, count in (
+        Booking.objects.filter(dorm_id__in=owners)
+        .values_list('dorm_id', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    ):
+        if status in STATUS_FIELDS:
+            setattr(rows[dorm_id], STATUS_FIELDS[status], count)
+
+    for dorm_id, total in (
+        Payment.objects.filter(booking__dorm_id__in=owners, is_verified=True)
+        .values_list('booking__dorm_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    ):
+        rows[dorm_id].confirmed_revenue = total or Decimal('0')
+
+    for dorm_id, count, total in (
+        Review.objects.filter(dorm_id__in=owners)
+        .values_list('dorm_id')
+        .annotate(count=Count('id'), total=Sum('rating'))
+        .order_by()
+    ):
+        rows[dorm_id].review_count = count
+        rows[dorm_id].rating_total = total or 0
+
+    DormSummary.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=['dorm'],
+        update_fields=SUMMARY_FIELDS,
+    )
+    return len(rows)
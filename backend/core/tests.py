@@ -1,3 +1,969 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import importlib
+import io
+import json
+import logging
+import re
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.apps import apps as django_apps
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from campusdorm_project.middleware import ReplicaPinningMiddleware
+from campusdorm_project.utils import db_routing, instrumentation, throttling
+from campusdorm_project.utils.db_pool import pool_stats
+from campusdorm_project.utils.pagination import EstimatedCountPaginator
+from campusdorm_project.utils.redis_client import FailureLog
+from .api.dorm import DormViewSet
+from .consumers import BookingNotificationConsumer
+from .exports import csv_chunks, export_rows
+from .models import Amenity, Booking, DailyDormStats, Dorm, DormSummary, Payment, PaymentWebhookEvent, Review, User
+from .notifications import user_group_name
+from .reconciliation import reconcile_statement
+from .serializers.dorm_serializers import DormSerializer
+from .rollups import rollup_range
+from .webhooks import SIGNATURE_HEADER, process_event, record_event, sign
 
-# Create your tests here.
+# In-process stand-ins for the Redis-backed services
+TEST_SERVICES = {
+    'CACHES': {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+        for alias in ('default', 'auth')
+    },
+    'THROTTLE_STORE': {'BACKEND': 'campusdorm_project.utils.throttling.LocalRateStore'},
+    'INSTRUMENTATION': {'BACKEND': 'campusdorm_project.utils.instrumentation.LocalMetrics'},
+    'CHANNEL_LAYERS': {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    'CHAT_PRESENCE': {'BACKEND': 'chat.presence.LocalPresence'},
+}
+
+
+def create_owner(username='owner', phone='+639171234567'):
+    return User.objects.create(username=username, role=User.Role.DORM_OWNER, phone=phone, is_verified=True)
+
+
+def create_student(username='student', phone='+639171234568', school_id='NEUST-2023-00111'):
+    return User.objects.create(username=username, role=User.Role.STUDENT, phone=phone, school_id_number=school_id)
+
+
+def create_dorm(owner, name='Dorm', **fields):
+    fields.setdefault('monthly_rate', 1500)
+    return Dorm.objects.create(owner=owner, name=name, address='Cabanatuan', is_approved=True, **fields)
+
+
+def create_bookings(user, dorm, count):
+    """Future bookings, one month apart, saved one by one so signals and checks run"""
+    start = timezone.localdate() + datetime.timedelta(days=30)
+    return [
+        Booking.objects.create(
+            user=user,
+            dorm=dorm,
+            move_in_date=start + datetime.timedelta(days=31 * i),
+            move_out_date=start + datetime.timedelta(days=31 * i + 30)
+        )
+        for i in range(count)
+    ]
+
+
+@override_settings(**TEST_SERVICES)
+class ReconcileStatementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        dorm = create_dorm(create_owner())
+        bookings = create_bookings(create_student(), dorm, 5)
+        cls.payments = {
+            reference: Payment.objects.create(
+                booking=booking,
+                amount=Decimal(amount),
+                method='gcash',
+                reference_number=reference,
+                is_verified=verified
+            )
+            for booking, (reference, amount, verified) in zip(bookings, [
+                ('MATCH', '1500.00', False),
+                ('SHORT', '2000.00', False),
+                ('DUP', '1500.00', False),
+                ('DONE', '1500.00', True),
+                ('CASHLIKE', '1500.00', False),
+            ])
+        }
+
+    def _reconcile(self, *rows, **options):
+        lines = ['reference_number,amount'] + [f'{reference},{amount}' for reference, amount in rows]
+        return reconcile_statement(lines, 'gcash', **options)
+
+    def _verified(self, reference):
+        return Payment.objects.get(pk=self.payments[reference].pk).is_verified
+
+    def test_exact_match_is_verified(self):
+        report = self._reconcile(('MATCH', '"1,500.00"'))
+        self.assertEqual(report['verified'], 1)
+        self.assertTrue(self._verified('MATCH'))
+
+    def test_amount_mismatch_is_reported_not_verified(self):
+        report = self._reconcile(('SHORT', '1999.99'))
+        self.assertEqual(report['verified'], 0)
+        [mismatch] = report['amount_mismatches']
+        self.assertEqual(mismatch['payment_id'], self.payments['SHORT'].pk)
+        self.assertEqual(mismatch['expected'], Decimal('2000.00'))
+        self.assertFalse(self._verified('SHORT'))
+
+    def test_unknown_reference_is_reported(self):
+        report = self._reconcile(('NOPE', '1500'))
+        self.assertEqual([entry['reference_number'] for entry in report['unmatched']], ['NOPE'])
+
+    def test_every_line_of_a_repeated_reference_is_a_duplicate(self):
+        # Split across chunks so the pre-scan, not the chunk, catches the repeat
+        report = self._reconcile(('DUP', '1500'), ('MATCH', '1500'), ('DUP', '1500'), chunk_size=1)
+        self.assertEqual([entry['line'] for entry in report['duplicates']], [2, 4])
+        self.assertFalse(self._verified('DUP'))
+        self.assertTrue(self._verified('MATCH'))
+
+    def test_already_verified_and_other_methods(self):
+        report = reconcile_statement(['reference_number,amount', 'DONE,1500'], 'gcash')
+        self.assertEqual((report['verified'], report['already_verified']), (0, 1))
+        report = reconcile_statement(['reference_number,amount', 'CASHLIKE,1500'], 'bank_transfer')
+        self.assertEqual(len(report['unmatched']), 1)
+
+    def test_dry_run_and_seekable_file(self):
+        statement = io.StringIO('reference_number,amount\nMATCH,1500\n')
+        report = reconcile_statement(statement, 'gcash', dry_run=True)
+        self.assertEqual(report['verified'], 1)
+        self.assertFalse(self._verified('MATCH'))
+
+    def test_missing_column_is_rejected(self):
+        with self.assertRaises(ValueError):
+            reconcile_statement(['reference,amount', 'MATCH,1500'], 'gcash')
+
+
+@override_settings(**TEST_SERVICES)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.student = create_student()
+        cls.dorm = create_dorm(cls.owner)
+        cls.dorm.amenities.set([Amenity.objects.create(name='WiFi', icon='fa-wifi')])
+        create_bookings(cls.student, cls.dorm, 2)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_dorm_detail_304_only_fetches_validators(self):
+        self.client.force_authenticate(self.owner)
+        url = f'/api/v1/dorms/{self.dorm.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_dorm_detail_permission_applies_before_304(self):
+        self.client.force_authenticate(create_owner('other', '+639171234569'))
+        response = self.client.get(f'/api/v1/dorms/{self.dorm.pk}/', HTTP_IF_NONE_MATCH='"*"')
+        self.assertEqual(response.status_code, 403)
+
+    def test_expanded_dorm_edit_changes_booking_etag(self):
+        self.client.force_authenticate(self.student)
+        url = '/api/v1/bookings/?expand=dorm&fields=id,dorm.name'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.dorm.name = 'Renamed'
+        self.dorm.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['dorm'], {'name': 'Renamed'})
+
+    def test_dorm_list_validates_on_etag_only(self):
+        older = create_dorm(self.owner, name='Older')
+        Dorm.objects.filter(pk=older.pk).update(updated_at=timezone.now() - datetime.timedelta(days=1))
+        self.client.force_authenticate(self.student)
+        response = self.client.get('/api/v1/dorms/')
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/v1/dorms/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Removing a row that isn't the newest leaves max(updated_at) where it was
+        older.delete()
+        tomorrow = http_date((timezone.now() + datetime.timedelta(days=1)).timestamp())
+        self.assertEqual(self.client.get('/api/v1/dorms/', HTTP_IF_MODIFIED_SINCE=tomorrow).status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/dorms/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_expanded_booking_detail_304_is_one_query(self):
+        self.client.force_authenticate(self.student)
+        booking = Booking.objects.filter(user=self.student).first()
+        url = f'/api/v1/bookings/{booking.pk}/?expand=dorm'
+        response = self.client.get(url)
+        self.assertEqual(response.json()['dorm']['name'], 'Dorm')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(**TEST_SERVICES)
+class RepresentationCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.dorm = create_dorm(cls.owner)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(create_student())
+
+    def _dorms(self, query=''):
+        return self.client.get(f'/api/v1/dorms/{query}').json()['results']
+
+    def test_edits_produce_fresh_representations(self):
+        self.assertEqual(self._dorms()[0]['name'], 'Dorm')
+        self.dorm.name = 'Renamed'
+        self.dorm.save()
+        self.assertEqual(self._dorms()[0]['name'], 'Renamed')
+
+        self.owner.username = 'landlord'
+        self.owner.save()
+        self.assertEqual(self._dorms()[0]['owner'], 'landlord')
+
+    def test_field_selections_are_cached_separately(self):
+        self.assertEqual(self._dorms('?fields=id'), [{'id': self.dorm.pk}])
+        self.assertEqual(self._dorms('?fields=id,name'), [{'id': self.dorm.pk, 'name': 'Dorm'}])
+
+        def key(query):
+            view = DormViewSet(request=Request(APIRequestFactory().get('/api/v1/dorms/', query)), format_kwarg=None)
+            return view._representation_key(self.dorm.pk, self.dorm.updated_at)
+
+        self.assertNotEqual(key({'fields': 'id'}), key({'fields': 'id,name'}))
+        self.assertEqual(key({'fields': 'name,id'}), key({'fields': 'id,name'}))
+
+
+@override_settings(**TEST_SERVICES)
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.student = create_student()
+        for i in range(3):
+            dorm = create_dorm(cls.owner, name=f'Dorm {i}')
+            dorm.amenities.set([Amenity.objects.create(name=f'Amenity {i}', icon='fa-star')])
+            create_bookings(cls.student, dorm, 1)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _get(self, url, queries):
+        with self.assertNumQueries(queries) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results'], ' '.join(query['sql'] for query in context.captured_queries)
+
+    def test_dorm_fields_drop_the_joins_they_do_not_render(self):
+        results, sql = self._get('/api/v1/dorms/', 5)
+        self.assertEqual(results[0]['amenities'], [{'id': results[0]['amenities'][0]['id'], 'name': 'Amenity 2', 'icon': 'fa-star'}])
+        self.assertIn('"core_user"', sql)
+
+        cache.clear()
+        results, sql = self._get('/api/v1/dorms/?fields=id,name', 4)  # No amenity prefetch
+        self.assertEqual(set(results[0]), {'id', 'name'})
+        self.assertNotIn('"core_user"', sql)
+
+    def test_booking_expand_inlines_the_dorm_in_one_join(self):
+        results, sql = self._get('/api/v1/bookings/', 3)
+        self.assertIsInstance(results[0]['dorm'], int)
+        self.assertNotIn('"core_dorm"', sql)
+
+        # Three bookings, still one join plus one amenity prefetch
+        results, sql = self._get('/api/v1/bookings/?expand=dorm', 4)
+        self.assertEqual({booking['dorm']['name'] for booking in results}, {'Dorm 0', 'Dorm 1', 'Dorm 2'})
+        self.assertEqual(results[0]['dorm']['owner'], 'owner')
+
+        results, _ = self._get('/api/v1/bookings/?expand=dorm&fields=id,dorm.name', 3)
+        self.assertEqual(set(results[0]), {'id', 'dorm'})
+        self.assertEqual(set(results[0]['dorm']), {'name'})
+
+    def test_fields_are_ignored_on_writes(self):
+        dorm = Dorm.objects.get(name='Dorm 0')
+        self.client.force_authenticate(self.owner)
+        response = self.client.patch(f'/api/v1/dorms/{dorm.pk}/?fields=id', {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Renamed')
+        self.assertIn('amenities', response.json())
+
+
+@override_settings(**TEST_SERVICES)
+class DormBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.dorms = [create_dorm(cls.owner, name=f'Dorm {i}') for i in range(3)]
+        for dorm in cls.dorms:
+            dorm.amenities.set([Amenity.objects.create(name=f'Amenity {dorm.pk}', icon='fa-star')])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _batch(self, ids):
+        return self.client.get('/api/v1/dorms/batch/', {'ids': ','.join(map(str, ids))})
+
+    def test_requested_order_without_duplicates_in_one_query(self):
+        first, second, third = (dorm.pk for dorm in self.dorms)
+        with self.assertNumQueries(2):  # Dorms with their owner, then amenities
+            response = self._batch([third, first, third, second, first])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([dorm['id'] for dorm in response.json()], [third, first, second])
+        self.assertEqual(response.json()[0]['amenities'][0]['name'], f'Amenity {third}')
+
+    def test_unknown_and_unapproved_ids_are_skipped(self):
+        hidden = Dorm.objects.create(owner=self.owner, name='Hidden', address='Cabanatuan', monthly_rate=1500)
+        response = self._batch([hidden.pk, self.dorms[0].pk, 999999])
+        self.assertEqual([dorm['id'] for dorm in response.json()], [self.dorms[0].pk])
+
+    def test_invalid_id_lists_are_rejected(self):
+        self.assertEqual(self._batch([]).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/dorms/batch/', {'ids': '1,two'}).status_code, 400)
+
+        response = self._batch(range(1, DormViewSet.batch_max_ids + 2))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': {'ids': [f'At most {DormViewSet.batch_max_ids} dorms per request']}})
+        # Duplicates don't count against the cap
+        self.assertEqual(self._batch([self.dorms[0].pk] * (DormViewSet.batch_max_ids + 1)).status_code, 200)
+
+    def test_object_permissions_apply_to_every_dorm(self):
+        other = create_dorm(create_owner('other', '+639171234569'), name='Other')
+        response = self._batch([self.dorms[0].pk, other.pk])
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(**TEST_SERVICES)
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = create_owner()
+        for i in range(3):
+            create_dorm(owner, name=f'Dorm {i}')
+
+    def _count(self, queryset, estimate):
+        with mock.patch('campusdorm_project.utils.pagination.estimate_row_count', return_value=estimate) as estimator:
+            return EstimatedCountPaginator(queryset, 10).count, estimator
+
+    def test_large_unfiltered_table_uses_the_estimate(self):
+        with self.assertNumQueries(0):
+            count, _ = self._count(Dorm.objects.all(), EstimatedCountPaginator.threshold + 1)
+        self.assertEqual(count, EstimatedCountPaginator.threshold + 1)
+
+    def test_small_or_unanalyzed_table_is_counted(self):
+        for estimate in (EstimatedCountPaginator.threshold, None):
+            with self.subTest(estimate=estimate):
+                self.assertEqual(self._count(Dorm.objects.all(), estimate)[0], 3)
+
+    def test_filtered_list_is_counted_without_estimating(self):
+        count, estimator = self._count(Dorm.objects.filter(name='Dorm 1'), 50000)
+        self.assertEqual(count, 1)
+        estimator.assert_not_called()
+
+
+@override_settings(**TEST_SERVICES, PAYMENT_WEBHOOKS={'SECRETS': {'gcash': 'test-secret'}, 'MAX_ATTEMPTS': 2})
+class PaymentWebhookTests(TestCase):
+    url = '/api/v1/payments/webhooks/gcash/'
+
+    @classmethod
+    def setUpTestData(cls):
+        [booking] = create_bookings(create_student(), create_dorm(create_owner()), 1)
+        cls.payment = Payment.objects.create(
+            booking=booking, amount=Decimal('1500.00'), method='gcash', reference_number='REF1'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _event(self, event_id='evt_1', amount='1500.00'):
+        return {'id': event_id, 'type': 'payment.succeeded', 'data': {'reference_number': 'REF1', 'amount': amount}}
+
+    def _deliver(self, payload, secret='test-secret', url=None):
+        body = json.dumps(payload).encode()
+        return self.client.post(
+            url or self.url, body, content_type='application/json', headers={SIGNATURE_HEADER: sign(secret, body)}
+        )
+
+    def test_redelivery_is_acknowledged_without_queueing(self):
+        with self.captureOnCommitCallbacks() as queued:
+            self.assertEqual(self._deliver(self._event()).status_code, 202)
+        self.assertEqual(len(queued), 1)
+        with self.captureOnCommitCallbacks() as queued:
+            response = self._deliver(self._event())
+        self.assertEqual((response.status_code, response.json()), (200, {'status': 'duplicate'}))
+        self.assertEqual(queued, [])
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 1)
+
+    def test_bad_signature_and_unknown_provider_are_refused(self):
+        self.assertEqual(self._deliver(self._event(), secret='wrong').status_code, 401)
+        self.assertEqual(self._deliver(self._event(), url='/api/v1/payments/webhooks/paypal/').status_code, 404)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_event_is_applied_exactly_once(self):
+        event = record_event('gcash', self._event())
+        self.assertIsNone(record_event('gcash', self._event()))
+        self.assertTrue(process_event(event.pk))
+        self.assertFalse(process_event(event.pk))
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (PaymentWebhookEvent.Status.PROCESSED, 1))
+        self.assertTrue(Payment.objects.get(pk=self.payment.pk).is_verified)
+
+    def test_failing_event_is_retried_then_marked_failed(self):
+        event = record_event('gcash', self._event(amount='999.00'))
+        with self.assertLogs('core.webhooks', 'WARNING'):
+            self.assertFalse(process_event(event.pk))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (PaymentWebhookEvent.Status.RECEIVED, 1))
+        self.assertIn('provider reported 999.00', event.last_error)
+
+        with self.assertLogs('core.webhooks', 'WARNING'):
+            process_event(event.pk)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (PaymentWebhookEvent.Status.FAILED, 2))
+        self.assertFalse(Payment.objects.get(pk=self.payment.pk).is_verified)
+
+
+class GCRATests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('campusdorm_project.utils.throttling.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = throttling.LocalRateStore()
+
+    def _acquire(self, times, key='client', limit=4, period=60):
+        return [self.store.acquire(key, limit, period) for _ in range(times)]
+
+    def test_full_burst_then_wait_for_one_interval(self):
+        # 4/minute: one request every 15s, up to 4 at once
+        self.assertEqual(self._acquire(5), [0, 0, 0, 0, 15])
+
+    def test_requests_are_spaced_once_burst_is_spent(self):
+        self._acquire(4)
+        self.now += 10
+        self.assertEqual(self._acquire(1), [5])
+        self.now += 5
+        self.assertEqual(self._acquire(2), [0, 15])
+
+    def test_refused_requests_do_not_push_the_window(self):
+        self._acquire(4)
+        self._acquire(10)
+        self.now += 15
+        self.assertEqual(self._acquire(1), [0])
+
+    def test_idle_client_gets_a_full_burst_back(self):
+        self._acquire(4)
+        self.now += 60
+        self.assertEqual(self._acquire(5), [0, 0, 0, 0, 15])
+
+    def test_clients_are_independent(self):
+        self._acquire(4)
+        self.assertEqual(self._acquire(1, key='other'), [0])
+
+    def test_expired_clients_are_dropped_at_capacity(self):
+        self.store.max_keys = 2
+        self._acquire(1, key='a')
+        self._acquire(1, key='b')
+        self.now += 60
+        self._acquire(1, key='c')
+        self.assertEqual(set(self.store._tats), {'c'})
+
+    def test_throttle_reports_whole_seconds_to_wait(self):
+        class Throttle(throttling.GCRARateThrottle):
+            rate = '4/min'
+
+            def get_cache_key(self, request, view):
+                return 'client'
+
+        with mock.patch('campusdorm_project.utils.throttling.get_rate_store', return_value=self.store):
+            throttle = Throttle()
+            self.assertTrue(all(throttle.allow_request(None, None) for _ in range(4)))
+            self.assertIsNone(throttle.wait())
+            self.now += 0.5
+            self.assertFalse(throttle.allow_request(None, None))
+            self.assertEqual(throttle.wait(), 15)
+
+
+class FailureLogTests(SimpleTestCase):
+    def test_repeats_within_the_interval_are_counted_not_logged(self):
+        log = FailureLog(logging.getLogger('core.tests'), 'Store down', interval=60)
+        with mock.patch('campusdorm_project.utils.redis_client.time.monotonic') as clock:
+            with self.assertLogs('core.tests', 'WARNING') as logs:
+                for now in (100, 110, 120, 161):
+                    clock.return_value = now
+                    log.record()
+        self.assertEqual([record.getMessage() for record in logs.records], [
+            'Store down (0 similar failures suppressed)',
+            'Store down (2 similar failures suppressed)',
+        ])
+
+
+@override_settings(**TEST_SERVICES)
+class BookingStatusNotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.student = create_student()
+        [cls.booking] = create_bookings(cls.student, create_dorm(cls.owner), 1)
+
+    def _listen(self, user):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(user_group_name(user.pk), channel)
+        return lambda: async_to_sync(layer.receive)(channel)
+
+    def test_confirming_publishes_to_student_and_owner_on_commit(self):
+        receivers = [self._listen(self.student), self._listen(self.owner)]
+        self.booking.status = Booking.Status.CONFIRMED
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.booking.save()
+        self.assertEqual(len(callbacks), 1)
+
+        for receive in receivers:
+            event = receive()
+            self.assertEqual(event['type'], 'booking.status')
+            self.assertEqual(
+                {key: event['booking'][key] for key in ('id', 'dorm', 'previous_status', 'status')},
+                {
+                    'id': self.booking.pk,
+                    'dorm': self.booking.dorm_id,
+                    'previous_status': 'pending',
+                    'status': 'confirmed'
+                }
+            )
+
+    def test_save_without_status_change_publishes_nothing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.booking.save()
+        self.assertEqual(callbacks, [])
+
+    def test_overlapping_booking_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            Booking.objects.create(
+                user=self.student,
+                dorm=self.booking.dorm,
+                move_in_date=self.booking.move_in_date + datetime.timedelta(days=1),
+                move_out_date=self.booking.move_out_date + datetime.timedelta(days=1)
+            )
+
+
+@override_settings(BOOKING_NOTIFICATION_WINDOW=0.01)
+class BookingNotificationConsumerTests(SimpleTestCase):
+    def _event(self, previous_status, status, booking_id=1):
+        return {
+            'type': 'booking.status',
+            'booking': {'id': booking_id, 'dorm': 1, 'previous_status': previous_status, 'status': status},
+        }
+
+    def _consumer(self):
+        consumer = BookingNotificationConsumer()
+        consumer._pending, consumer._flush_timer, consumer._flush_tasks = {}, None, set()
+        consumer.send = mock.AsyncMock()
+        return consumer
+
+    async def _deliver(self, *events, disconnect=False):
+        consumer = self._consumer()
+        for event in events:
+            await consumer.booking_status(event)
+        if disconnect:
+            consumer._schedule_flush()  # As if the window just closed
+            await consumer.disconnect(1000)
+        await asyncio.sleep(0.05)
+        return [json.loads(call.kwargs['text_data']) for call in consumer.send.await_args_list]
+
+    def test_transitions_inside_the_window_are_merged(self):
+        frames = asyncio.run(self._deliver(
+            self._event('pending', 'confirmed'),
+            self._event('confirmed', 'completed'),
+            self._event('pending', 'canceled', booking_id=2),
+        ))
+        bookings = [frame['booking'] for frame in frames]
+        summary = [(booking['id'], booking['previous_status'], booking['status']) for booking in bookings]
+        self.assertEqual(summary, [(1, 'pending', 'completed'), (2, 'pending', 'canceled')])
+
+    def test_disconnect_cancels_the_timer_and_a_scheduled_flush(self):
+        self.assertEqual(asyncio.run(self._deliver(self._event('pending', 'confirmed'), disconnect=True)), [])
+
+
+@override_settings(**TEST_SERVICES)
+class DormSummaryTests(TestCase):
+    fields = (
+        'pending_bookings', 'confirmed_bookings', 'completed_bookings',
+        'confirmed_revenue', 'review_count', 'rating_total'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.student = create_student()
+        cls.dorm = create_dorm(cls.owner)
+
+    def _summary(self):
+        return DormSummary.objects.filter(dorm=self.dorm).values(*self.fields).get()
+
+    def _activity(self):
+        """Bookings, payments and reviews through the ORM, as the API would write them"""
+        first, second, third = create_bookings(self.student, self.dorm, 3)
+        first.status = Booking.Status.CONFIRMED
+        first.save()
+        third.status = Booking.Status.CANCELED
+        third.save()
+        payment = Payment.objects.create(booking=first, amount=Decimal('1500.00'), method='gcash', reference_number='A')
+        Payment.objects.create(booking=second, amount=Decimal('900.00'), method='gcash', reference_number='B')
+        payment.is_verified = True
+        payment.save()
+        Review.objects.create(user=self.student, dorm=self.dorm, rating=4)
+        other = create_student('other', '+639171234569', 'NEUST-2023-00112')
+        Review.objects.create(user=other, dorm=self.dorm, rating=2).delete()
+        return first, second
+
+    def test_saves_status_changes_and_deletes_move_the_counters(self):
+        first, second = self._activity()
+        self.assertEqual(self._summary(), {
+            'pending_bookings': 1, 'confirmed_bookings': 1, 'completed_bookings': 0,
+            'confirmed_revenue': Decimal('1500.00'), 'review_count': 1, 'rating_total': 4,
+        })
+        first.delete()  # Cascades to its verified payment
+        second.delete()
+        self.assertEqual(self._summary(), {
+            'pending_bookings': 0, 'confirmed_bookings': 0, 'completed_bookings': 0,
+            'confirmed_revenue': Decimal('0.00'), 'review_count': 1, 'rating_total': 4,
+        })
+
+    def test_rebuilds_agree_with_incremental_counters(self):
+        self._activity()
+        expected = self._summary()
+
+        DormSummary.objects.update(pending_bookings=9, confirmed_revenue=0, review_count=0)
+        call_command('reconcile_dorm_summaries', stdout=io.StringIO())
+        self.assertEqual(self._summary(), expected)
+
+        DormSummary.objects.all().delete()
+        backfill = importlib.import_module('core.migrations.0010_backfill_dorm_summaries')
+        backfill.backfill_summaries(django_apps, None)
+        self.assertEqual(self._summary(), expected)
+
+    def test_dashboard_totals(self):
+        self._activity()
+        create_dorm(self.owner, name='Annex')
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get('/api/v1/owner/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['totals'], {
+            'dorms': 2, 'pending_bookings': 1, 'confirmed_bookings': 1,
+            'confirmed_revenue': 1500.0, 'average_rating': 4.0,
+        })
+        self.assertEqual([dorm['dorm_name'] for dorm in body['dorms']], ['Annex', 'Dorm'])
+
+
+@override_settings(**TEST_SERVICES)
+class DailyRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = create_student()
+        dorm = create_dorm(create_owner())
+        first, second, third = create_bookings(cls.student, dorm, 3)
+        first.status = Booking.Status.CONFIRMED
+        first.save()
+        for booking, reference, method in ((first, 'A', 'gcash'), (second, 'B', 'cash')):
+            payment = Payment.objects.create(
+                booking=booking, amount=Decimal('1500.00'), method=method, reference_number=reference
+            )
+            payment.is_verified = True
+            payment.save()
+        Payment.objects.create(booking=third, amount=Decimal('700.00'), method='gcash', reference_number='C')
+        cls.today = timezone.localdate()
+
+    def _rows(self, *fields):
+        fields = fields or (
+            'date', 'dorm_id', 'bookings_created', 'occupied_bookings', 'payments_verified',
+            'revenue_cash', 'revenue_gcash', 'revenue_bank_transfer'
+        )
+        return list(DailyDormStats.objects.order_by('date', 'dorm_id').values_list(*fields))
+
+    def test_rollup_range_matches_incremental_counts(self):
+        # Occupancy is only ever computed by rollups, so compare the incremental columns
+        fields = ('date', 'dorm_id', 'bookings_created', 'payments_verified', 'revenue_cash', 'revenue_gcash')
+        incremental = self._rows(*fields)
+        self.assertEqual(incremental[0][2:], (3, 2, Decimal('1500.00'), Decimal('1500.00')))
+        rollup_range(self.today, self.today + datetime.timedelta(days=1))
+        self.assertEqual(self._rows(*fields), incremental)
+
+    def test_chunk_size_does_not_change_the_rows(self):
+        results = []
+        for chunk_days in (1, 7, 90):
+            call_command(
+                'rollup_daily_stats',
+                start=self.today,
+                end=self.today + datetime.timedelta(days=70),
+                chunk_days=chunk_days,
+                stdout=io.StringIO()
+            )
+            results.append(self._rows())
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        # The confirmed booking occupies its 30 nights, starting 30 days out
+        self.assertEqual(sum(row[3] for row in results[0]), 30)
+
+    def test_analytics_rejects_bad_parameters(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='admin', role=User.Role.ADMIN, is_staff=True))
+        url = '/api/v1/admin/analytics/'
+        for params in ({'start': '2026-02-01', 'end': '2026-01-01'}, {'dorm': 'abc'}, {'group': 'year'}):
+            with self.subTest(**params):
+                self.assertEqual(client.get(url, params).status_code, 400)
+
+        response = client.get(url, {'start': self.today.isoformat(), 'end': self.today.isoformat(), 'group': 'day'})
+        [row] = response.json()['results']
+        self.assertEqual((row['bookings_created'], row['payments_verified']), (3, 2))
+
+
+@override_settings(**TEST_SERVICES)
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = create_owner()
+        for i in range(3):
+            create_dorm(owner, name=f'Dorm {i}')
+        cls.staff = User.objects.create(username='admin', role=User.Role.ADMIN, is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _server_timing(self, response):
+        return dict(part.split(';', 1) for part in re.split(r', (?=\w+;)', response['Server-Timing']))
+
+    def test_staff_get_server_timing(self):
+        self.client.force_authenticate(self.staff)
+        timing = self._server_timing(self.client.get('/api/v1/dorms/'))
+        self.assertEqual(set(timing), {'db', 'cache', 'serialize', 'total'})
+        self.assertRegex(timing['db'], r'^dur=[\d.]+;desc="[1-9]\d* queries"$')
+        hits, misses = map(int, re.fullmatch(r'desc="(\d+) hits, (\d+) misses"', timing['cache']).groups())
+        self.assertGreater(hits + misses, 0)
+
+    def test_other_users_do_not(self):
+        self.client.force_authenticate(create_student())
+        self.assertNotIn('Server-Timing', self.client.get('/api/v1/dorms/'))
+
+    def test_metrics_require_the_configured_token(self):
+        self.client.get('/api/v1/dorms/')
+        with self.settings(INSTRUMENTATION={**TEST_SERVICES['INSTRUMENTATION'], 'TOKEN': 'scrape'}):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('# TYPE http_requests_total counter', response.content.decode())
+        with self.settings(INSTRUMENTATION={**TEST_SERVICES['INSTRUMENTATION'], 'TOKEN': ''}):
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    def test_only_configured_caches_and_opted_in_serializers_are_timed(self):
+        instrumentation.install()
+        standalone = LocMemCache('standalone', {})
+        token = instrumentation.enter_request()
+        try:
+            timings = instrumentation.current_timings()
+            caches['default'].get('missing')
+            standalone.get('missing')
+            serializers.ListSerializer(child=serializers.CharField()).to_representation(['a'])
+            self.assertEqual((timings.cache_hits, timings.cache_misses, timings.serializer_seconds), (0, 1, 0))
+
+            DormSerializer(Dorm.objects.all(), many=True).data
+            self.assertGreater(timings.serializer_seconds, 0)
+            self.assertEqual(timings.serializer_depth, 0)
+        finally:
+            instrumentation.exit_request(token)
+
+
+class MetricsStoreTests(SimpleTestCase):
+    def test_pool_gauges_are_described(self):
+        stats = {'default': {'connections_in_use': 2, 'requests_total': 10}}
+        with mock.patch('campusdorm_project.utils.instrumentation.pool_stats', return_value=stats):
+            lines = instrumentation.LocalMetrics().render().splitlines()
+        index = lines.index('db_pool_connections_in_use{alias="default"} 2')
+        self.assertEqual(lines[index - 1], '# TYPE db_pool_connections_in_use gauge')
+        self.assertIn('# TYPE db_pool_requests_total counter', lines)
+
+    def test_pool_stats_from_psycopg_counters(self):
+        pool = mock.Mock(closed=False)
+        # psycopg omits counters that never fired
+        pool.get_stats.return_value = {
+            'pool_size': 5, 'pool_available': 2, 'pool_max': 20, 'requests_num': 4, 'requests_wait_ms': 10,
+        }
+        with mock.patch.object(connections['default'], 'pool', pool, create=True):
+            stats = pool_stats()
+        self.assertEqual(stats, {'default': {
+            'connections_in_use': 3,
+            'connections_open': 5,
+            'connections_max': 20,
+            'requests_waiting': 0,
+            'requests_total': 4,
+            'requests_timed_out': 0,
+            'wait_ms_total': 10,
+            'wait_ms_average': 2.5,
+        }})
+
+        pool.closed = True  # Not opened yet
+        with mock.patch.object(connections['default'], 'pool', pool, create=True):
+            self.assertEqual(pool_stats(), {})
+
+    def test_unreachable_redis_renders_without_stored_series(self):
+        store = instrumentation.RedisMetrics('redis://127.0.0.1:1/0')
+        with self.assertLogs('campusdorm_project.utils.instrumentation', 'WARNING'):
+            text = store.render()
+        self.assertIn('# TYPE http_requests_total counter', text)
+        self.assertNotIn('http_requests_total{', text)
+
+
+@override_settings(**TEST_SERVICES)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = create_owner()
+        student = create_student()
+        cls.dorm = create_dorm(owner, name='Dorm, North')  # Needs CSV quoting
+        cls.other_dorm = create_dorm(owner, name='Other')
+        cls.bookings = create_bookings(student, cls.dorm, 3) + create_bookings(student, cls.other_dorm, 1)
+        cls.bookings[1].status = Booking.Status.CONFIRMED
+        cls.bookings[1].save()
+        Payment.objects.create(booking=cls.bookings[1], amount=Decimal('1500.00'), is_verified=True)
+        Payment.objects.create(booking=cls.bookings[2], amount=Decimal('1500.00'))
+        # One booking made last week
+        Booking.objects.filter(pk=cls.bookings[0].pk).update(created_at=timezone.now() - datetime.timedelta(days=7))
+        cls.admin = User.objects.create(username='admin', role=User.Role.ADMIN, phone='+639171234570', is_staff=True)
+
+    def _ids(self, kind, **filters):
+        _, rows = export_rows(kind, **filters)
+        return [row[0] for row in rows]
+
+    def test_filters(self):
+        first, second, third, fourth = (booking.pk for booking in self.bookings)
+        today = timezone.localdate()
+        self.assertEqual(self._ids('bookings'), [first, second, third, fourth])
+        self.assertEqual(self._ids('bookings', start=today), [second, third, fourth])
+        self.assertEqual(self._ids('bookings', end=today - datetime.timedelta(days=1)), [first])
+        self.assertEqual(self._ids('bookings', dorm=self.other_dorm.pk), [fourth])
+        self.assertEqual(self._ids('bookings', status='confirmed'), [second])
+        self.assertEqual(len(self._ids('payments', status='verified')), 1)
+        with self.assertRaises(ValueError):
+            export_rows('bookings', status='verified')
+        with self.assertRaises(ValueError):
+            export_rows('reviews')
+
+    def test_csv_and_jsonl_framing(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/v1/admin/exports/bookings.csv', {'dorm': self.other_dorm.pk})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,student,dorm_id,dorm,move_in_date,move_out_date,status,created_at')
+        self.assertEqual(len(lines), 2)
+
+        response = client.get('/api/v1/admin/exports/bookings.jsonl', {'status': 'confirmed'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['dorm'], 'Dorm, North')
+        self.assertEqual(rows[0]['move_in_date'], self.bookings[1].move_in_date.isoformat())
+
+        self.assertEqual(client.get('/api/v1/admin/exports/bookings.xml').status_code, 400)
+        self.assertEqual(client.get('/api/v1/admin/exports/bookings.csv', {'status': 'lost'}).status_code, 400)
+        client.force_authenticate(create_student('other', '+639171234569', 'NEUST-2023-00112'))
+        self.assertEqual(client.get('/api/v1/admin/exports/bookings.csv').status_code, 403)
+
+    def test_csv_quotes_and_batches_rows(self):
+        header, rows = export_rows('bookings', dorm=self.dorm.pk)
+        chunks = list(csv_chunks(header, rows, batch_size=2))
+        self.assertEqual(len(chunks), 3)  # Header, then two batches of at most two rows
+        self.assertIn('"Dorm, North"', chunks[1])
+
+    def test_command_streams_with_the_requested_chunk_size(self):
+        output = io.StringIO()
+        with mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            call_command('export_records', 'payments', '--format', 'jsonl', '--chunk-size', '2', stdout=output)
+        self.assertEqual(iterator.call_args.kwargs, {'chunk_size': 2})
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([row['booking_id'] for row in rows], [self.bookings[1].pk, self.bookings[2].pk])
+        self.assertEqual(rows[0]['amount'], '1500.00')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], **TEST_SERVICES)
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.dorm = create_dorm(cls.owner)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _reads(self, method, url, data=None):
+        """Aliases the router picked for each read; the reads themselves still run on the test database"""
+        reads = []
+        route = db_routing.ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            reads.append(route(router, model, **hints))
+
+        with mock.patch.object(db_routing.ReplicaRouter, 'db_for_read', autospec=True, side_effect=record):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300)
+        return set(reads)
+
+    def test_router_outside_a_request(self):
+        router = db_routing.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Dorm))
+        token = db_routing.enter_request()
+        try:
+            db_routing.routing_state().replica = 'replica_1'
+            self.assertEqual(router.db_for_read(Dorm), 'replica_1')
+            self.assertEqual(router.db_for_write(Dorm), 'default')
+            self.assertIsNone(router.db_for_read(Dorm))  # The rest of a writing request stays on the primary
+        finally:
+            db_routing.exit_request(token)
+        self.assertIsNone(router.db_for_read(Dorm))
+
+    def test_replica_views_read_from_the_replica(self):
+        self.assertEqual(self._reads('get', '/api/v1/dorms/'), {'replica_1'})
+        self.assertEqual(self._reads('get', f'/api/v1/dorms/{self.dorm.pk}/'), {'replica_1'})
+        self.assertEqual(self._reads('get', '/api/v1/owner/dashboard/'), {None})
+
+    def test_writers_read_from_the_primary_until_the_window_passes(self):
+        self._reads('patch', f'/api/v1/dorms/{self.dorm.pk}/', {'name': 'Renamed'})
+        self.assertEqual(self._reads('get', '/api/v1/dorms/'), {None})
+
+        self.client.force_authenticate(create_student())
+        self.assertEqual(self._reads('get', '/api/v1/dorms/'), {'replica_1'})
+
+        cache.delete(f'db_pin:{self.owner.pk}')  # The window expiring
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self._reads('get', '/api/v1/dorms/'), {'replica_1'})
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_pinning_middleware_unloads_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinningMiddleware(lambda request: None)
+        self._reads('patch', f'/api/v1/dorms/{self.dorm.pk}/', {'name': 'Renamed'})
+        self.assertFalse(db_routing.is_pinned(self.owner))
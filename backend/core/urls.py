@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api import auth, dorm, booking
+from .api import auth, dorm, booking, dashboard, analytics, payments, webhooks, exports, monitoring
 from rest_framework.schemas import get_schema_view
 
 # API Versioning
@@ -29,6 +29,33 @@ urlpatterns = [
     path(f'api/{API_VERSION}/auth/refresh/', auth.SecureTokenRefreshView.as_view(), name='token_refresh'),
     path(f'api/{API_VERSION}/auth/me/', auth.UserDetailView.as_view(), name='user-detail'),
     
+    # Owner dashboard
+    path(f'api/{API_VERSION}/owner/dashboard/', dashboard.OwnerDashboardView.as_view(), name='owner-dashboard'),
+    
+    # Admin analytics (daily rollups)
+    path(f'api/{API_VERSION}/admin/analytics/', analytics.AdminAnalyticsView.as_view(), name='admin-analytics'),
+    path(
+        f'api/{API_VERSION}/admin/payments/reconcile/',
+        payments.PaymentReconciliationView.as_view(),
+        name='admin-payment-reconcile'
+    ),
+    path(
+        f'api/{API_VERSION}/admin/exports/<str:kind>.<str:file_format>',
+        exports.ExportView.as_view(),
+        name='admin-export'
+    ),
+    path(f'api/{API_VERSION}/admin/db-pool/', monitoring.DatabasePoolView.as_view(), name='admin-db-pool'),
+    
+    # Payment provider callbacks
+    path(
+        f'api/{API_VERSION}/payments/webhooks/<str:provider>/',
+        webhooks.PaymentWebhookView.as_view(),
+        name='payment-webhook'
+    ),
+    
+    # Prometheus scrape target, unversioned by convention
+    path('metrics', monitoring.MetricsView.as_view(), name='metrics'),
+    
     # Include main router URLs
     path(f'api/{API_VERSION}/', include(router.urls)),
     
@@ -0,0 +1,163 @@
+import hashlib
+import hmac
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from decimal import Decimal
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from .models import Payment, PaymentWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+
+
+def get_secret(provider):
+    """Shared HMAC secret for a provider, or None if it isn't configured"""
+    return settings.PAYMENT_WEBHOOKS['SECRETS'].get(provider) or None
+
+
+def sign(secret, body):
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+
+def record_event(provider, payload):
+    """
+    Store a verified callback once. Returns the new event, or None for a
+    retry of one already stored. Retries take the read path on the unique
+    index so a storm of them doesn't turn into failed inserts.
+    """
+    event_id = str(payload['id'])
+    existing = PaymentWebhookEvent.objects.filter(provider=provider, event_id=event_id)
+    if existing.exists():
+        return None
+    try:
+        with transaction.atomic():
+            return PaymentWebhookEvent.objects.create(
+                provider=provider,
+                event_id=event_id,
+                event_type=str(payload.get('type', '')),
+                payload=payload
+            )
+    except IntegrityError:
+        return None  # A concurrent delivery of the same event won
+
+
+def process_event(event_id):
+    """
+    Apply one stored event exactly once. The status claim and the payment
+    change share a transaction, so a failure leaves the event 'received'
+    for process_payment_webhooks to retry.
+    """
+    try:
+        with transaction.atomic():
+            claimed = PaymentWebhookEvent.objects.filter(
+                pk=event_id,
+                status=PaymentWebhookEvent.Status.RECEIVED
+            ).update(
+                status=PaymentWebhookEvent.Status.PROCESSED,
+                processed_at=timezone.now(),
+                attempts=F('attempts') + 1
+            )
+            if not claimed:
+                return False
+            apply_event(PaymentWebhookEvent.objects.get(pk=event_id))
+    except Exception as exc:
+        logger.warning("Payment webhook event %s failed: %s", event_id, exc)
+        max_attempts = settings.PAYMENT_WEBHOOKS.get('MAX_ATTEMPTS', 5)
+        PaymentWebhookEvent.objects.filter(
+            pk=event_id,
+            status=PaymentWebhookEvent.Status.RECEIVED
+        ).update(
+            attempts=F('attempts') + 1,
+            last_error=str(exc),
+            status=Case(
+                When(attempts__gte=max_attempts - 1, then=Value(PaymentWebhookEvent.Status.FAILED)),
+                default=Value(PaymentWebhookEvent.Status.RECEIVED)
+            )
+        )
+        return False
+    return True
+
+
+def apply_event(event):
+    """Verify (or record) the payment a 'payment.succeeded' event refers to"""
+    if event.event_type != 'payment.succeeded':
+        return  # Other event types are kept for auditing only
+    data = event.payload.get('data', {})
+    reference = data['reference_number']
+    amount = Decimal(str(data['amount']))
+
+    payment = (
+        Payment.objects.select_for_update()
+        .filter(method=event.provider, reference_number=reference)
+        .first()
+    )
+    if payment is None:
+        if data.get('booking_id') is None:
+            raise ValueError(f"No {event.provider} payment with reference {reference}")
+        payment = Payment(
+            booking_id=data['booking_id'],
+            method=event.provider,
+            reference_number=reference,
+            amount=amount
+        )
+    elif payment.amount != amount:
+        raise ValueError(f"Payment #{payment.pk} is {payment.amount}, provider reported {amount}")
+
+    if not payment.is_verified:
+        payment.is_verified = True
+        payment.save()  # Signals keep dashboard summaries and rollups current
+
+
+class WebhookQueue:
+    """Thread pool that processes accepted events after the response is sent"""
+
+    def __init__(self, workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='payment-webhook')
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def submit(self, event_id):
+        future = self._executor.submit(self._run, event_id)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+
+    def join(self, timeout=None):
+        """Wait for queued events (used by the fake provider and shutdown)"""
+        with self._lock:
+            futures = set(self._futures)
+        wait(futures, timeout=timeout)
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    @staticmethod
+    def _run(event_id):
+        close_old_connections()
+        try:
+            process_event(event_id)
+        except Exception:
+            logger.exception("Payment webhook worker crashed on event %s", event_id)
+        finally:
+            close_old_connections()
+
+
+_queue = None
+
+
+def get_webhook_queue():
+    """Return the process-wide queue, sized by PAYMENT_WEBHOOKS['WORKERS']"""
+    global _queue
+    if _queue is None:
+        _queue = WebhookQueue(workers=settings.PAYMENT_WEBHOOKS.get('WORKERS', 4))
+    return _queue